@@ -9,39 +9,16 @@ from app.api.v1.endpoints import auth, users, pets, tasks, metrics, websocket
 # Create main API router
 api_router = APIRouter()
 
-# Include all endpoint routers
-api_router.include_router(
-    auth.router,
-    prefix="/auth",
-    tags=["Authentication"]
-)
-
-api_router.include_router(
-    users.router,
-    prefix="/users",
-    tags=["Users"]
-)
-
-api_router.include_router(
-    pets.router,
-    prefix="/pets",
-    tags=["Pets"]
+# Endpoint routers as (router, prefix, tag)
+_ROUTES = (
+    (auth.router, "/auth", "Authentication"),
+    (users.router, "/users", "Users"),
+    (pets.router, "/pets", "Pets"),
+    (tasks.router, "/tasks", "Tasks"),
+    (metrics.router, "/metrics", "Pet Metrics"),
+    (websocket.router, "/ws", "WebSocket"),
 )
 
-api_router.include_router(
-    tasks.router,
-    prefix="/tasks",
-    tags=["Tasks"]
-)
-
-api_router.include_router(
-    metrics.router,
-    prefix="/metrics",
-    tags=["Pet Metrics"]
-)
-
-api_router.include_router(
-    websocket.router,
-    prefix="/ws",
-    tags=["WebSocket"]
-)
\ No newline at end of file
+# Include all endpoint routers
+for _router, _prefix, _tag in _ROUTES:
+    api_router.include_router(_router, prefix=_prefix, tags=[_tag])
\ No newline at end of file
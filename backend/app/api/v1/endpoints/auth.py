@@ -3,13 +3,16 @@
 Authentication endpoints for user registration and login
 """
 
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, Optional, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from pydantic import BaseModel, EmailStr, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, StringConstraints, field_validator
+import asyncio
+import hmac
 import logging
+import re
 
 from app.core.config import settings
 from app.core.database import get_db
@@ -18,7 +21,8 @@ from app.core.security import (
     create_refresh_token,
     verify_password,
     get_password_hash,
-    decode_token
+    decode_token,
+    revoke_token
 )
 
 logger = logging.getLogger(__name__)
@@ -29,34 +33,56 @@ router = APIRouter()
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+# Lightweight email shape check for login (registration keeps full EmailStr validation)
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+# Access token lifetime in seconds, reported in token responses
+_EXPIRES_IN = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+# Identifier fields drop surrounding whitespace; passwords are taken verbatim,
+# so these models strip per field instead of setting str_strip_whitespace
+_StrippedStr = Annotated[str, StringConstraints(strip_whitespace=True)]
+
 # Pydantic models for request/response
 class UserRegister(BaseModel):
     """User registration schema"""
     email: EmailStr
-    username: str = Field(..., min_length=3, max_length=50)
+    username: _StrippedStr = Field(..., min_length=3, max_length=50)
     password: str = Field(..., min_length=8)
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "email": "user@example.com",
                 "username": "catcarer123",
                 "password": "securepassword123"
             }
         }
+    )
 
 class UserLogin(BaseModel):
     """User login schema"""
-    email: EmailStr
+    email: _StrippedStr
     password: str
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "email": "user@example.com",
                 "password": "securepassword123"
             }
         }
+    )
+    
+    @field_validator("email")
+    @classmethod
+    def check_email(cls, v: str) -> str:
+        """Validate email shape with a precompiled regex"""
+        if not _EMAIL_RE.match(v):
+            raise ValueError("Invalid email address")
+        return v
 
 class Token(BaseModel):
     """Token response schema"""
@@ -68,6 +94,8 @@ class Token(BaseModel):
 class TokenRefresh(BaseModel):
     """Token refresh schema"""
     refresh_token: str
+    
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
 
 class UserResponse(BaseModel):
     """User response schema"""
@@ -77,11 +105,44 @@ class UserResponse(BaseModel):
     created_at: datetime
     is_active: bool = True
 
+# Dependency to get current user
+async def get_current_active_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Dependency to get the current active user
+    Use this in other endpoints that require authentication
+    """
+    payload = decode_token(token)
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    # In production, query user from database and check if active
+    user = {
+        "id": payload.get("user_id"),
+        "email": payload.get("sub"),
+        "is_active": True
+    }
+    
+    if not user["is_active"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+    
+    return user
+
 # Endpoints
 @router.post("/register", response_model=Dict[str, Any], status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserRegister,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Register a new user
@@ -102,14 +163,17 @@ async def register(
         # 4. Generate tokens
         
         # Mock user creation
-        hashed_password = get_password_hash(user_data.password)
+        # Hash in the worker pool so the event loop is not blocked
+        hashed_password = await asyncio.get_running_loop().run_in_executor(
+            request.app.state.hash_pool, get_password_hash, user_data.password
+        )
         
         # Create mock user object
         user = {
             "id": 1,
             "email": user_data.email,
             "username": user_data.username,
-            "created_at": datetime.utcnow()
+            "created_at": datetime.now(timezone.utc)
         }
         
         # Generate tokens
@@ -129,16 +193,16 @@ async def register(
         }
         
     except Exception as e:
-        logger.error(f"Registration error: {e}")
+        logger.error("Registration error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Registration failed"
         )
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=None, responses={200: {"model": Token}})
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Login with email and password
@@ -157,8 +221,10 @@ async def login(
         email = form_data.username
         password = form_data.password
         
-        # Mock user validation
-        if email != "user@example.com" or password != "password123":
+        # Mock user validation (constant-time, both checks always run)
+        email_ok = hmac.compare_digest(email.encode(), b"user@example.com")
+        password_ok = hmac.compare_digest(password.encode(), b"password123")
+        if not (email_ok & password_ok):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
@@ -173,26 +239,26 @@ async def login(
             data={"sub": email, "user_id": 1}
         )
         
-        return {
-            "access_token": access_token,
-            "refresh_token": refresh_token,
-            "token_type": "bearer",
-            "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
-        }
+        return Token.model_construct(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            token_type="bearer",
+            expires_in=_EXPIRES_IN
+        )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Login error: {e}")
+        logger.error("Login error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Login failed"
         )
 
-@router.post("/refresh", response_model=Token)
+@router.post("/refresh", response_model=None, responses={200: {"model": Token}})
 async def refresh_token(
     token_data: TokenRefresh,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Refresh access token using refresh token
@@ -220,17 +286,17 @@ async def refresh_token(
             data={"sub": email, "user_id": user_id}
         )
         
-        return {
-            "access_token": access_token,
-            "refresh_token": new_refresh_token,
-            "token_type": "bearer",
-            "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
-        }
+        return Token.model_construct(
+            access_token=access_token,
+            refresh_token=new_refresh_token,
+            token_type="bearer",
+            expires_in=_EXPIRES_IN
+        )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Token refresh error: {e}")
+        logger.error("Token refresh error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Token refresh failed"
@@ -239,34 +305,31 @@ async def refresh_token(
 @router.post("/logout")
 async def logout(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Logout user (invalidate token)
-    
-    In production, you would add the token to a blacklist
+    Logout user (revoke the access token until it expires)
     """
     try:
-        # In production:
-        # 1. Decode token to get user info
-        # 2. Add token to blacklist in Redis
-        # 3. Clear any server-side sessions
+        # Only the caller's token is revoked and evicted; other users' cache entries stay
+        payload = decode_token(token)
+        if payload is not None:
+            revoke_token(token, payload)
         
         return {
             "message": "Logged out successfully"
         }
         
     except Exception as e:
-        logger.error(f"Logout error: {e}")
+        logger.error("Logout error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Logout failed"
         )
 
-@router.get("/me", response_model=UserResponse)
+@router.get("/me", response_model=None, responses={200: {"model": UserResponse}})
 async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
     """
     Get current user information
@@ -275,61 +338,19 @@ async def get_current_user(
         Current user data
     """
     try:
-        # Decode token
-        payload = decode_token(token)
-        if not payload:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         # In production, query user from database
         # For now, return mock data
-        return UserResponse(
-            id=payload.get("user_id", 1),
-            email=payload.get("sub", "user@example.com"),
+        return UserResponse.model_construct(
+            id=current_user.get("id") or 1,
+            email=current_user.get("email") or "user@example.com",
             username="catcarer123",
-            created_at=datetime.utcnow(),
-            is_active=True
+            created_at=datetime.now(timezone.utc),
+            is_active=current_user["is_active"]
         )
         
-    except HTTPException:
-        raise
     except Exception as e:
-        logger.error(f"Get user error: {e}")
+        logger.error("Get user error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to get user information"
         )
-
-# Dependency to get current user
-async def get_current_active_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> Dict[str, Any]:
-    """
-    Dependency to get the current active user
-    Use this in other endpoints that require authentication
-    """
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    # In production, query user from database and check if active
-    user = {
-        "id": payload.get("user_id"),
-        "email": payload.get("sub"),
-        "is_active": True
-    }
-    
-    if not user["is_active"]:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Inactive user"
-        )
-    
-    return user
\ No newline at end of file
@@ -3,14 +3,21 @@
 Pet management endpoints
 """
 
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Optional, Mapping
+from datetime import datetime, timezone
+from types import MappingProxyType
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse
+from fastapi_cache import FastAPICache
+from fastapi_cache.decorator import cache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, ConfigDict, Field, field_serializer
 import logging
+import numpy as np
 
 from app.core.database import get_db
+from app.models.pet import PetOwnership
 from app.api.v1.endpoints.auth import get_current_active_user
 from app.core.websocket import websocket_manager
 
@@ -19,19 +26,105 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter()
 
+# Food effects on pet metrics (read-only, shared across requests)
+FOOD_EFFECTS: Mapping[str, Mapping[str, int]] = MappingProxyType({
+    "catnip": MappingProxyType({
+        "happiness": 20,
+        "hunger": -30,
+        "energy": 10,
+        "cost": 10
+    })
+})
+
+# Interaction effects on pet metrics
+ACTION_EFFECTS: Mapping[str, Mapping[str, int]] = MappingProxyType({
+    "pet": MappingProxyType({"happiness": 5, "energy": 0}),
+    "play": MappingProxyType({"happiness": 10, "energy": -15}),
+    "sleep": MappingProxyType({"energy": 50, "happiness": 0})
+})
+_NO_EFFECT: Mapping[str, int] = MappingProxyType({"happiness": 0, "energy": 0})
+
+# Mock metrics history ranges (inclusive low, exclusive high) per metric
+_HISTORY_METRICS = ("happiness", "hunger", "health", "energy", "currency")
+_HISTORY_LOW = (40, 20, 60, 30, 105)
+_HISTORY_HIGH = (91, 81, 101, 101, 146)
+
+# Cached pet reads are keyed by a per-pet version; a write bumps it so every old
+# key (any user, any query) is orphaned without scanning for it. Version keys
+# outlive the longest read TTL, after which a reset to 0 can't revive a stale key
+_PET_CACHE_VERSION_TTL = 86400
+
+def _pet_list_cache_key(user_id: int) -> str:
+    """Exact cache key of a user's pet list"""
+    return f"{FastAPICache.get_prefix()}:user:{user_id}:get_user_pets"
+
+def _pet_cache_version_key(pet_id: int) -> str:
+    return f"{FastAPICache.get_prefix()}:version:pet:{pet_id}"
+
+async def _pet_cache_key_builder(
+    func,
+    namespace: str = "",
+    *,
+    request=None,
+    response=None,
+    args=(),
+    kwargs=None
+) -> str:
+    """
+    Build cache keys scoped to the pet (or the user for pet lists)
+    so writes can invalidate them without a KEYS scan
+    """
+    kwargs = kwargs or {}
+    user_id = kwargs["current_user"]["id"]
+    pet_id = kwargs.get("pet_id")
+    if pet_id is None:
+        return _pet_list_cache_key(user_id)
+    try:
+        version = await FastAPICache.get_backend().redis.get(_pet_cache_version_key(pet_id))
+    except Exception as e:
+        # Backend down; fastapi-cache swallows its own get/set errors, so serve uncached
+        logger.warning("Failed to read cache version for pet %s: %s", pet_id, e)
+        version = None
+    return (
+        f"{FastAPICache.get_prefix()}:pet:{pet_id}:v{int(version or 0)}:"
+        f"{func.__name__}:{user_id}:{kwargs.get('hours', '')}"
+    )
+
+async def _invalidate_pet_cache(db: AsyncSession, pet_id: Optional[int], user_id: int) -> None:
+    """Delete the pet lists of the user and every owner, and retire the pet's cached reads"""
+    try:
+        user_ids = {user_id}
+        if pet_id is not None:
+            user_ids.update(await db.scalars(
+                select(PetOwnership.user_id).where(PetOwnership.pet_id == pet_id)
+            ))
+        redis = FastAPICache.get_backend().redis
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.delete(*(_pet_list_cache_key(uid) for uid in user_ids))
+            if pet_id is not None:
+                version_key = _pet_cache_version_key(pet_id)
+                pipe.incr(version_key)
+                pipe.expire(version_key, _PET_CACHE_VERSION_TTL)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning("Failed to invalidate cached reads for pet %s: %s", pet_id, e)
+
 # Pydantic models
 class PetCreate(BaseModel):
     """Schema for creating a new pet"""
     name: str = Field(..., min_length=1, max_length=50)
     sprite_id: Optional[int] = 1  # Default sprite
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        frozen=True,
+        str_strip_whitespace=True,
+        json_schema_extra={
             "example": {
                 "name": "Whiskers",
                 "sprite_id": 1
             }
         }
+    )
 
 class PetMetrics(BaseModel):
     """Pet metrics schema"""
@@ -51,26 +144,48 @@ class PetResponse(BaseModel):
     metrics: PetMetrics
     owners: List[Dict[str, Any]]
     is_sleeping: bool = False
+    
+    @field_serializer("created_at")
+    def _isoformat(self, value: datetime) -> str:
+        """datetime.isoformat(), like the nested owner timestamps and WebSocket payloads"""
+        return value.isoformat()
+
+def _pet_response(pet: Dict[str, Any]) -> PetResponse:
+    """Wrap server-built pet data in PetResponse without re-validating it"""
+    return PetResponse.model_construct(
+        **{**pet, "metrics": PetMetrics.model_construct(**pet["metrics"])}
+    )
 
 class PetInvite(BaseModel):
     """Schema for inviting users to co-own a pet"""
     user_email: str = Field(..., description="Email of user to invite")
     role: str = Field(default="co-owner", description="Role for the invited user")
+    
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
 
 class FeedPet(BaseModel):
     """Schema for feeding a pet"""
     food_item: str = Field(default="catnip", description="Food item to give")
     
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
+    
 class PetAction(BaseModel):
     """Schema for pet interactions"""
     action: str = Field(..., description="Action to perform (pet, play, sleep)")
+    
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
 
 # Endpoints
-@router.post("/", response_model=PetResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=None,
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_201_CREATED: {"model": PetResponse}}
+)
 async def create_pet(
     pet_data: PetCreate,
     current_user: Dict = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new pet
@@ -79,12 +194,15 @@ async def create_pet(
     - **sprite_id**: Visual appearance ID
     """
     try:
+        now = datetime.now(timezone.utc)
+        now_iso = now.isoformat()
+        
         # Mock pet creation
         new_pet = {
             "id": 1,
             "name": pet_data.name,
             "sprite_id": pet_data.sprite_id,
-            "created_at": datetime.utcnow(),
+            "created_at": now,
             "created_by": current_user["id"],
             "metrics": {
                 "happiness": 50,
@@ -97,12 +215,14 @@ async def create_pet(
                 "user_id": current_user["id"],
                 "email": current_user["email"],
                 "role": "owner",
-                "joined_at": datetime.utcnow().isoformat()
+                "joined_at": now_iso
             }],
             "is_sleeping": False
         }
         
-        logger.info(f"User {current_user['id']} created pet: {pet_data.name}")
+        logger.info("User %s created pet: %s", current_user['id'], pet_data.name)
+        
+        await _invalidate_pet_cache(db, None, current_user["id"])
         
         # Send WebSocket notification
         await websocket_manager.broadcast(
@@ -113,30 +233,34 @@ async def create_pet(
             }
         )
         
-        return new_pet
+        return _pet_response(new_pet)
         
     except Exception as e:
-        logger.error(f"Error creating pet: {e}")
+        logger.error("Error creating pet: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create pet"
         )
 
-@router.get("/", response_model=List[PetResponse])
-async def get_user_pets(
+@router.get("/", response_model=None, responses={200: {"model": List[PetResponse]}})
+@cache(expire=30, key_builder=_pet_cache_key_builder)
+def get_user_pets(
     current_user: Dict = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all pets owned or co-owned by the current user
     """
     try:
+        now = datetime.now(timezone.utc)
+        now_iso = now.isoformat()
+        
         # Mock response
         pets = [{
             "id": 1,
             "name": "Whiskers",
             "sprite_id": 1,
-            "created_at": datetime.utcnow(),
+            "created_at": now,
             "created_by": current_user["id"],
             "metrics": {
                 "happiness": 75,
@@ -149,37 +273,41 @@ async def get_user_pets(
                 "user_id": current_user["id"],
                 "email": current_user["email"],
                 "role": "owner",
-                "joined_at": datetime.utcnow().isoformat()
+                "joined_at": now_iso
             }],
             "is_sleeping": False
         }]
         
-        return pets
+        return [_pet_response(pet) for pet in pets]
         
     except Exception as e:
-        logger.error(f"Error fetching pets: {e}")
+        logger.error("Error fetching pets: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch pets"
         )
 
-@router.get("/{pet_id}", response_model=PetResponse)
-async def get_pet(
+@router.get("/{pet_id}", response_model=None, responses={200: {"model": PetResponse}})
+@cache(expire=30, key_builder=_pet_cache_key_builder)
+def get_pet(
     pet_id: int,
     current_user: Dict = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get a specific pet by ID
     """
     try:
+        now = datetime.now(timezone.utc)
+        now_iso = now.isoformat()
+        
         # Mock response
         # In production, verify user has access to this pet
         pet = {
             "id": pet_id,
             "name": "Whiskers",
             "sprite_id": 1,
-            "created_at": datetime.utcnow(),
+            "created_at": now,
             "created_by": 1,
             "metrics": {
                 "happiness": 75,
@@ -192,15 +320,15 @@ async def get_pet(
                 "user_id": current_user["id"],
                 "email": current_user["email"],
                 "role": "owner",
-                "joined_at": datetime.utcnow().isoformat()
+                "joined_at": now_iso
             }],
             "is_sleeping": False
         }
         
-        return pet
+        return _pet_response(pet)
         
     except Exception as e:
-        logger.error(f"Error fetching pet {pet_id}: {e}")
+        logger.error("Error fetching pet %s: %s", pet_id, e)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Pet not found"
@@ -211,7 +339,7 @@ async def feed_pet(
     pet_id: int,
     feed_data: FeedPet,
     current_user: Dict = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Feed a pet with food items
@@ -221,16 +349,7 @@ async def feed_pet(
     """
     try:
         # Mock feeding logic
-        food_effects = {
-            "catnip": {
-                "happiness": 20,
-                "hunger": -30,
-                "energy": 10,
-                "cost": 10
-            }
-        }
-        
-        effect = food_effects.get(feed_data.food_item, food_effects["catnip"])
+        effect = FOOD_EFFECTS.get(feed_data.food_item, FOOD_EFFECTS["catnip"])
         
         # Update metrics (mock)
         new_metrics = {
@@ -241,6 +360,8 @@ async def feed_pet(
             "currency": 125 - effect["cost"]
         }
         
+        await _invalidate_pet_cache(db, pet_id, current_user["id"])
+        
         # Send WebSocket update
         await websocket_manager.send_pet_metrics_update(
             str(pet_id),
@@ -255,7 +376,7 @@ async def feed_pet(
         }
         
     except Exception as e:
-        logger.error(f"Error feeding pet {pet_id}: {e}")
+        logger.error("Error feeding pet %s: %s", pet_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to feed pet"
@@ -266,7 +387,7 @@ async def interact_with_pet(
     pet_id: int,
     action_data: PetAction,
     current_user: Dict = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Interact with a pet (pet, play, make sleep)
@@ -276,13 +397,7 @@ async def interact_with_pet(
     - **sleep**: Pet sleeps to restore energy
     """
     try:
-        action_effects = {
-            "pet": {"happiness": 5, "energy": 0},
-            "play": {"happiness": 10, "energy": -15},
-            "sleep": {"energy": 50, "happiness": 0}
-        }
-        
-        effect = action_effects.get(action_data.action, {"happiness": 0, "energy": 0})
+        effect = dict(ACTION_EFFECTS.get(action_data.action, _NO_EFFECT))
         
         # Mock metric update
         result = {
@@ -293,6 +408,8 @@ async def interact_with_pet(
             "animation": action_data.action  # Trigger animation on frontend
         }
         
+        await _invalidate_pet_cache(db, pet_id, current_user["id"])
+        
         # Send WebSocket notification for pet interaction
         await websocket_manager.broadcast_to_pet(
             str(pet_id),
@@ -307,18 +424,18 @@ async def interact_with_pet(
         return result
         
     except Exception as e:
-        logger.error(f"Error interacting with pet {pet_id}: {e}")
+        logger.error("Error interacting with pet %s: %s", pet_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to interact with pet"
         )
 
 @router.post("/{pet_id}/invite", response_model=Dict[str, Any])
-async def invite_co_owner(
+def invite_co_owner(
     pet_id: int,
     invite_data: PetInvite,
     current_user: Dict = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Invite another user to co-own a pet
@@ -341,12 +458,12 @@ async def invite_co_owner(
             "status": "pending"
         }
         
-        logger.info(f"User {current_user['id']} invited {invite_data.user_email} to pet {pet_id}")
+        logger.info("User %s invited %s to pet %s", current_user['id'], invite_data.user_email, pet_id)
         
         return result
         
     except Exception as e:
-        logger.error(f"Error inviting co-owner: {e}")
+        logger.error("Error inviting co-owner: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to send invitation"
@@ -357,7 +474,7 @@ async def remove_co_owner(
     pet_id: int,
     user_id: int,
     current_user: Dict = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Remove a co-owner from a pet
@@ -374,6 +491,8 @@ async def remove_co_owner(
             "removed_user_id": user_id
         }
         
+        await _invalidate_pet_cache(db, pet_id, current_user["id"])
+        
         # Notify via WebSocket
         await websocket_manager.broadcast_to_pet(
             str(pet_id),
@@ -387,18 +506,19 @@ async def remove_co_owner(
         return result
         
     except Exception as e:
-        logger.error(f"Error removing co-owner: {e}")
+        logger.error("Error removing co-owner: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to remove co-owner"
         )
 
-@router.get("/{pet_id}/metrics/history", response_model=List[Dict[str, Any]])
-async def get_metrics_history(
+@router.get("/{pet_id}/metrics/history", response_class=ORJSONResponse, response_model=None)
+@cache(expire=60, key_builder=_pet_cache_key_builder)
+def get_metrics_history(
     pet_id: int,
     hours: int = Query(default=24, description="Hours of history to retrieve"),
     current_user: Dict = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get historical metrics for a pet
@@ -406,29 +526,26 @@ async def get_metrics_history(
     Useful for charts and tracking pet health over time
     """
     try:
-        # Mock historical data
-        import random
-        from datetime import timedelta
-        
-        history = []
-        base_time = datetime.utcnow()
-        
-        for i in range(hours):
-            history.append({
-                "timestamp": (base_time - timedelta(hours=i)).isoformat(),
-                "metrics": {
-                    "happiness": random.randint(40, 90),
-                    "hunger": random.randint(20, 80),
-                    "health": random.randint(60, 100),
-                    "energy": random.randint(30, 100),
-                    "currency": 125 + random.randint(-20, 20)
-                }
-            })
-        
-        return history
+        # Mock historical data, generated in one vectorized pass
+        n = max(hours, 0)
+        values = np.random.randint(
+            _HISTORY_LOW, _HISTORY_HIGH, size=(n, len(_HISTORY_METRICS))
+        ).tolist()
+        # Naive UTC datetime64 values, suffixed to match the isoformat() offset elsewhere
+        timestamps = np.char.add(np.datetime_as_string(
+            np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None), "us") - np.arange(n).astype("timedelta64[h]")
+        ), "+00:00").tolist()
+        
+        history = [
+            {"timestamp": timestamp, "metrics": dict(zip(_HISTORY_METRICS, row))}
+            for timestamp, row in zip(timestamps, values)
+        ]
+        
+        # Server-built payload, skip response_model validation and encoding
+        return ORJSONResponse(history)
         
     except Exception as e:
-        logger.error(f"Error fetching metrics history: {e}")
+        logger.error("Error fetching metrics history: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch metrics history"
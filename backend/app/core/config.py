@@ -1,9 +1,19 @@
 # backend/app/core/config.py
 
 import os
-from typing import Any, Dict, Optional, List, Union
+from functools import cached_property, lru_cache
+from typing import Any, Dict, Optional, List, Tuple, Union
 from pydantic_settings import BaseSettings
-from pydantic import field_validator, ConfigDict
+from pydantic import ConfigDict
+
+
+def _split_csv(value: Any, fallback: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Parse a comma-separated string (or list) setting into a tuple"""
+    if isinstance(value, str):
+        return tuple(item.strip() for item in value.split(",") if item.strip())
+    elif isinstance(value, (list, tuple)):
+        return tuple(value)
+    return fallback
 
 
 class Settings(BaseSettings):
@@ -28,11 +38,20 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    ARGON2_TIME_COST: int = 2
+    ARGON2_MEMORY_COST: int = 19456  # KiB
+    ARGON2_PARALLELISM: int = 1
     
     # Database
     DATABASE_URL: str = "sqlite:///./purretys.db"  # Default to SQLite for development
     DATABASE_POOL_SIZE: int = 20
-    DATABASE_MAX_OVERFLOW: int = 40
+    DATABASE_MAX_OVERFLOW: int = -1  # No cap on burst connections; set a bound if server max_connections is tight
+    DATABASE_POOL_RECYCLE: int = 1800  # Seconds before a pooled connection is replaced
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_POOL_USE_LIFO: bool = True  # Reuse the most recent connection to keep a warm subset
+    DATABASE_POOL_MIN_SIZE: int = 10  # Connections the raw asyncpg read pool opens at startup
+    DATABASE_POOL_MAX_INACTIVE_LIFETIME: int = 300  # Seconds before an idle asyncpg connection is closed
+    DATABASE_QUERY_CACHE_SIZE: int = 1200  # Compiled statements kept per engine
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -45,8 +64,8 @@ class Settings(BaseSettings):
     # CORS - Use Union[str, List[str]] to handle both string and list inputs
     CORS_ORIGINS: Union[str, List[str]] = "http://localhost:5173,http://localhost:3000,http://127.0.0.1:5173,http://127.0.0.1:3000"
     CORS_ALLOW_CREDENTIALS: bool = True
-    CORS_ALLOW_METHODS: Union[str, List[str]] = "*"
-    CORS_ALLOW_HEADERS: Union[str, List[str]] = "*"
+    CORS_ALLOW_METHODS: Union[str, List[str]] = "GET,POST,PUT,DELETE,PATCH,OPTIONS"
+    CORS_ALLOW_HEADERS: Union[str, List[str]] = "Authorization,Content-Type"
     
     # WebSocket
     WS_MESSAGE_QUEUE: str = "redis://localhost:6379/3"
@@ -86,51 +105,25 @@ class Settings(BaseSettings):
         "currency": 100
     }
     
-    @field_validator('CORS_ORIGINS', mode='before')
-    @classmethod
-    def parse_cors_origins(cls, v: Any) -> List[str]:
-        """Parse CORS origins from environment variable"""
-        if isinstance(v, str):
-            if v == "*":
-                return ["*"]
-            return [origin.strip() for origin in v.split(",") if origin.strip()]
-        elif isinstance(v, list):
-            return v
-        return ["http://localhost:5173", "http://localhost:3000"]  # fallback
-    
-    @field_validator('CORS_ALLOW_METHODS', mode='before')
-    @classmethod
-    def parse_cors_methods(cls, v: Any) -> List[str]:
-        """Parse CORS methods from environment variable"""
-        if isinstance(v, str):
-            if v == "*":
-                return ["*"]
-            return [method.strip() for method in v.split(",") if method.strip()]
-        elif isinstance(v, list):
-            return v
-        return ["*"]  # fallback
-    
-    @field_validator('CORS_ALLOW_HEADERS', mode='before')
-    @classmethod
-    def parse_cors_headers(cls, v: Any) -> List[str]:
-        """Parse CORS headers from environment variable"""
-        if isinstance(v, str):
-            if v == "*":
-                return ["*"]
-            return [header.strip() for header in v.split(",") if header.strip()]
-        elif isinstance(v, list):
-            return v
-        return ["*"]  # fallback
-    
-    @field_validator('ALLOWED_EXTENSIONS', mode='before')
-    @classmethod
-    def parse_allowed_extensions(cls, v: Any) -> List[str]:
-        """Parse allowed file extensions from environment variable"""
-        if isinstance(v, str):
-            return [ext.strip() for ext in v.split(",") if ext.strip()]
-        elif isinstance(v, list):
-            return v
-        return ["jpg", "jpeg", "png", "gif", "webp"]  # fallback
+    @cached_property
+    def cors_origins(self) -> Tuple[str, ...]:
+        """CORS origins parsed once from the raw setting"""
+        return _split_csv(self.CORS_ORIGINS, ("http://localhost:5173", "http://localhost:3000"))
+    
+    @cached_property
+    def cors_allow_methods(self) -> Tuple[str, ...]:
+        """CORS methods parsed once from the raw setting"""
+        return _split_csv(self.CORS_ALLOW_METHODS, ("GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"))
+    
+    @cached_property
+    def cors_allow_headers(self) -> Tuple[str, ...]:
+        """CORS headers parsed once from the raw setting"""
+        return _split_csv(self.CORS_ALLOW_HEADERS, ("Authorization", "Content-Type"))
+    
+    @cached_property
+    def allowed_extensions(self) -> Tuple[str, ...]:
+        """Allowed upload extensions parsed once from the raw setting"""
+        return _split_csv(self.ALLOWED_EXTENSIONS, ("jpg", "jpeg", "png", "gif", "webp"))
     
     @property
     def database_url_sync(self) -> str:
@@ -150,19 +143,28 @@ class Settings(BaseSettings):
         return self.ENVIRONMENT.lower() == "development"
 
 
-# Create global settings instance with error handling
-try:
-    settings = Settings()
-except Exception as e:
-    print(f"Configuration error: {e}")
-    print("Using fallback configuration for development...")
-    # Fallback to minimal settings for development
-    settings = Settings(
-        APP_NAME="Purretys",
-        DEBUG=True,
-        SECRET_KEY="development-secret-key",
-        DATABASE_URL="sqlite:///./purretys.db",
-        CORS_ORIGINS="http://localhost:5173,http://localhost:3000",
-        CORS_ALLOW_METHODS="*",
-        CORS_ALLOW_HEADERS="*"
-    )
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Return the process-wide settings instance
+    Built once on first call; usable as a FastAPI dependency
+    """
+    try:
+        return Settings()
+    except Exception as e:
+        print(f"Configuration error: {e}")
+        print("Using fallback configuration for development...")
+        # Fallback to minimal settings for development
+        return Settings(
+            APP_NAME="Purretys",
+            DEBUG=True,
+            SECRET_KEY="development-secret-key",
+            DATABASE_URL="sqlite:///./purretys.db",
+            CORS_ORIGINS="http://localhost:5173,http://localhost:3000",
+            CORS_ALLOW_METHODS="GET,POST,PUT,DELETE,PATCH,OPTIONS",
+            CORS_ALLOW_HEADERS="Authorization,Content-Type"
+        )
+
+
+# Global settings instance (kept for existing imports)
+settings = get_settings()
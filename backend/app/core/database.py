@@ -4,38 +4,72 @@ Database configuration and session management
 Uses SQLAlchemy for ORM and database operations
 """
 
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import create_engine, inspect, MetaData, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
 from sqlalchemy.pool import NullPool, QueuePool
-from typing import Generator
+from fastapi import HTTPException, Request, status
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Optional
 import logging
-from contextlib import asynccontextmanager
+import time
+from datetime import date, datetime, timezone
 
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    import asyncpg
+
 logger = logging.getLogger(__name__)
 
-# Database URL
-DATABASE_URL = settings.DATABASE_URL
+# Database URL (sync driver, used for table creation, scripts and migrations)
+DATABASE_URL = settings.database_url_sync
+
+# Async database URL (used for request handling)
+if DATABASE_URL.startswith("sqlite://"):
+    ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+else:
+    ASYNC_DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+# Connection pool options shared by the sync and async engines
+POOL_OPTIONS = {
+    "pool_size": settings.DATABASE_POOL_SIZE,
+    "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+    "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,  # Verify connections before using
+    "pool_recycle": settings.DATABASE_POOL_RECYCLE,  # Avoid stale server-side connections
+    "pool_use_lifo": settings.DATABASE_POOL_USE_LIFO,
+}
+
+# Engine options shared by every engine; the compiled-statement cache must
+# hold all distinct ORM queries or they get recompiled per request
+ENGINE_OPTIONS = {
+    "echo": settings.DEBUG,
+    "query_cache_size": settings.DATABASE_QUERY_CACHE_SIZE,
+}
 
 # Create engine based on database type
-if settings.DATABASE_URL.startswith("sqlite"):
+if DATABASE_URL.startswith("sqlite"):
     # SQLite specific settings
     engine = create_engine(
         DATABASE_URL,
         connect_args={"check_same_thread": False},  # Needed for SQLite
-        echo=settings.DEBUG,
+        **ENGINE_OPTIONS,
+    )
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        **ENGINE_OPTIONS,
     )
 else:
     # PostgreSQL/MySQL settings with connection pooling
     engine = create_engine(
         DATABASE_URL,
         poolclass=QueuePool,
-        pool_size=settings.DATABASE_POOL_SIZE,
-        max_overflow=settings.DATABASE_MAX_OVERFLOW,
-        pool_pre_ping=True,  # Verify connections before using
-        echo=settings.DEBUG,
+        **ENGINE_OPTIONS,
+        **POOL_OPTIONS,
+    )
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        **ENGINE_OPTIONS,
+        **POOL_OPTIONS,
     )
 
 # Create SessionLocal class
@@ -45,65 +79,92 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Async session maker
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
 # Create Base class for models
 metadata = MetaData()
-Base = declarative_base(metadata=metadata)
+
+class Base(DeclarativeBase):
+    """Declarative base for all models (SQLAlchemy 2.0 style)"""
+    metadata = metadata
 
 # Dependency to get database session
-def get_db() -> Generator[Session, None, None]:
+async def get_db() -> AsyncIterator[AsyncSession]:
     """
     Database session dependency for FastAPI
-    Yields a database session and ensures it's closed after use
+    Yields an async database session and ensures it's closed after use
     """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-# Async database setup (optional for future use)
-# Only set up async engine if using PostgreSQL
-if not settings.DATABASE_URL.startswith("sqlite"):
-    from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-    from contextlib import asynccontextmanager
-    
-    # Convert to async URL if using PostgreSQL
-    async_url = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
+    async with AsyncSessionLocal() as session:
+        yield session
+
+# Raw asyncpg pool for read-heavy paths (PostgreSQL only)
+async def create_pool() -> Optional["asyncpg.Pool"]:
+    """
+    Create the shared asyncpg pool, warmed to DATABASE_POOL_MIN_SIZE connections
+    Returns None when the database is not PostgreSQL
+    """
+    if not DATABASE_URL.startswith("postgresql://"):
+        return None
     
-    # Async engine
-    async_engine = create_async_engine(
-        async_url,
-        echo=settings.DEBUG,
-        pool_size=settings.DATABASE_POOL_SIZE,
-        max_overflow=settings.DATABASE_MAX_OVERFLOW,
-    )
+    import asyncpg  # Only PostgreSQL deployments pay for the driver import
     
-    # Async session maker
-    AsyncSessionLocal = async_sessionmaker(
-        async_engine,
-        class_=AsyncSession,
-        expire_on_commit=False
+    pool = await asyncpg.create_pool(
+        DATABASE_URL,
+        min_size=settings.DATABASE_POOL_MIN_SIZE,
+        max_size=settings.DATABASE_POOL_SIZE,
+        max_inactive_connection_lifetime=settings.DATABASE_POOL_MAX_INACTIVE_LIFETIME,
     )
+    logger.info("asyncpg pool created")
+    return pool
+
+async def start_listener(
+    pool: "asyncpg.Pool",
+    channel: str,
+    handler: Callable[[str], None]
+) -> "asyncpg.Connection":
+    """
+    Hold one pooled connection LISTENing on a NOTIFY channel
+    handler receives each payload; release the returned connection to stop
+    """
+    con = await pool.acquire()
+    await con.add_listener(channel, lambda _con, _pid, _channel, payload: handler(payload))
+    return con
+
+async def get_pool_conn(request: Request) -> AsyncIterator["asyncpg.Connection"]:
+    """
+    Pooled asyncpg connection dependency for raw read queries
+    Writes should keep using the SQLAlchemy session from get_db
     
-    # Async session dependency
-    async def get_async_db() -> AsyncSession:
-        """
-        Async database session dependency
-        """
-        async with AsyncSessionLocal() as session:
-            try:
-                yield session
-                await session.commit()
-            except Exception:
-                await session.rollback()
-                raise
-            finally:
-                await session.close()
-else:
-    # Async not supported for SQLite
-    async_engine = None
-    AsyncSessionLocal = None
-    get_async_db = None
+    No route depends on this yet: the read endpoints still serve mock data,
+    and the pool is None on SQLite, so it is wired in as they get real queries
+    """
+    pool = request.app.state.pool
+    if pool is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Raw connection pool is not available for this database"
+        )
+    async with pool.acquire() as con:
+        yield con
+
+# Async session dependency with transaction handling
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Async database session dependency
+    Commits on success and rolls back on error
+    """
+    async with AsyncSessionLocal() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
 
 # Database initialization functions
 def init_db() -> None:
@@ -115,13 +176,55 @@ def init_db() -> None:
         # Import all models here to ensure they're registered with Base
         from app.models import user, pet, task  # noqa
         
+        existing = set(inspect(engine).get_table_names())
+        
         # Create all tables
         Base.metadata.create_all(bind=engine)
+        create_monthly_partitions()
         logger.info("Database tables created successfully")
+        
+        # Existing pets tables predate the denormalized metrics snapshot
+        if {"pets", "pet_metrics"} <= existing:
+            with engine.begin() as conn:
+                if pet.upgrade_pet_snapshot(conn):
+                    logger.info("Added and backfilled pet metrics snapshot columns")
     except Exception as e:
-        logger.error(f"Error creating database tables: {e}")
+        logger.error("Error creating database tables: %s", e)
         raise
 
+def create_monthly_partitions(months_ahead: int = 3) -> None:
+    """
+    Create monthly range partitions (current month plus months_ahead) and a
+    DEFAULT partition for every partitioned table. Idempotent, so running it
+    at each startup or from a monthly job keeps partitions ahead of inserts
+    """
+    partitioned = [
+        table for table in Base.metadata.sorted_tables
+        if table.dialect_options["postgresql"].get("partition_by")
+    ]
+    if not partitioned or engine.dialect.name != "postgresql":
+        return
+    
+    today = datetime.now(timezone.utc).date()
+    months = []
+    for offset in range(months_ahead + 1):
+        year, month = divmod(today.month - 1 + offset, 12)
+        start = date(today.year + year, month + 1, 1)
+        end_year, end_month = divmod(start.month, 12)
+        end = date(start.year + end_year, end_month + 1, 1)
+        months.append((start, end))
+    
+    with engine.begin() as conn:
+        for table in partitioned:
+            for start, end in months:
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {table.name}_{start:%Y_%m} PARTITION OF {table.name} "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                ))
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {table.name}_default PARTITION OF {table.name} DEFAULT"
+            ))
+
 def drop_db() -> None:
     """
     Drop all database tables
@@ -131,36 +234,33 @@ def drop_db() -> None:
         Base.metadata.drop_all(bind=engine)
         logger.info("Database tables dropped successfully")
     except Exception as e:
-        logger.error(f"Error dropping database tables: {e}")
+        logger.error("Error dropping database tables: %s", e)
         raise
 
+# Health check result cache: (checked_at monotonic time, healthy)
+_HEALTH_CACHE = (0.0, False)
+_HEALTH_TTL = 2.0  # Seconds a health result is reused
+
 # Health check function
 def check_database_health() -> bool:
     """
     Check if database is accessible
     Returns True if healthy, False otherwise
+    Results are reused for _HEALTH_TTL seconds so probe storms don't hit the database
     """
+    global _HEALTH_CACHE
+    checked_at, healthy = _HEALTH_CACHE
+    now = time.monotonic()
+    if checked_at and now - checked_at < _HEALTH_TTL:
+        return healthy
+    
     try:
         with engine.connect() as conn:
-            conn.execute("SELECT 1")
-        return True
+            conn.execute(text("SELECT 1"))
+        healthy = True
     except Exception as e:
-        logger.error(f"Database health check failed: {e}")
-        return False
-
-# Context manager for database transactions
-@asynccontextmanager
-async def database_transaction():
-    """
-    Async context manager for database transactions
-    Automatically commits on success and rolls back on error
-    """
-    async with AsyncSessionLocal() as session:
-        try:
-            yield session
-            await session.commit()
-        except Exception:
-            await session.rollback()
-            raise
-        finally:
-            await session.close()
\ No newline at end of file
+        logger.error("Database health check failed: %s", e)
+        healthy = False
+    
+    _HEALTH_CACHE = (now, healthy)
+    return healthy
\ No newline at end of file
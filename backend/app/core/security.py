@@ -3,19 +3,115 @@
 Security utilities for password hashing and JWT token management
 """
 
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-import secrets
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, Hashable, Tuple
+from jose import JWTError, jwk, jwt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerifyMismatchError
+import base64
+import bcrypt
+import hmac
+import orjson
+import os
 import logging
+import threading
+import time
 
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# New hashes are argon2id; bcrypt hashes from before the switch still verify
+_PASSWORD_HASHER = PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM
+)
+
+# bcrypt only looks at the first 72 bytes of a password
+_BCRYPT_MAX_BYTES = 72
+
+# Parse the signing key once; jose would otherwise rebuild it on every encode/decode
+_SIGNING_KEY = jwk.construct(settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+# Keyed SHA-256 template for token signing and API key hashing, copied per call
+_SECRET_HMAC = hmac.new(settings.SECRET_KEY.encode(), digestmod="sha256")
+
+# Precomputed pieces for signing HS256 access tokens without jose's generic path
+_HS256_HEADER_B64 = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=")
+
+# Upper bound on how long a decoded payload is trusted without re-verifying
+DECODE_CACHE_TTL_SECONDS = 300
+
+class _TTLCache:
+    """
+    Small thread-safe LRU cache whose entries expire at a per-entry deadline
+    """
+    
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+    
+
+def _random_urlsafe(nbytes: int) -> str:
+    """URL-safe base64 of nbytes from os.urandom, without padding"""
+    return base64.urlsafe_b64encode(os.urandom(nbytes)).rstrip(b"=").decode("ascii")
+
+def _encode_hs256(claims: Dict[str, Any]) -> str:
+    """
+    Sign fixed-shape HS256 claims directly: header is precomputed and the HMAC
+    context pre-keyed, so only the payload is serialized per call
+    """
+    payload_b64 = base64.urlsafe_b64encode(orjson.dumps(claims)).rstrip(b"=")
+    signing_input = _HS256_HEADER_B64 + b"." + payload_b64
+    signer = _SECRET_HMAC.copy()
+    signer.update(signing_input)
+    signature_b64 = base64.urlsafe_b64encode(signer.digest()).rstrip(b"=")
+    return (signing_input + b"." + signature_b64).decode("ascii")
+
+_decode_cache = _TTLCache()
+
+# jti -> True for revoked tokens, kept until the token would have expired anyway.
+# Per process, like the decode cache
+_revoked_jtis = _TTLCache(maxsize=65536)
+
+def revoke_token(token: str, payload: Dict[str, Any]) -> None:
+    """
+    Revoke a decoded token until it expires and drop its cached payload (used on logout)
+    
+    Args:
+        token: The encoded token
+        payload: Its decoded payload
+    """
+    jti = payload.get("jti")
+    if jti is not None:
+        _revoked_jtis.set(jti, True, payload.get("exp", time.time()))
+    _decode_cache.pop(token)
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -30,22 +126,31 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     """
     to_encode = data.copy()
     
+    now = int(time.time())
+    
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + int(expires_delta.total_seconds())
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
     
+    # Integer timestamps, as jose would produce from datetimes. Every token gets
+    # its own jti so one session can be revoked without the others, which is
+    # also why issued tokens are not memoized
     to_encode.update({
         "exp": expire,
-        "iat": datetime.utcnow(),
-        "type": "access"
+        "iat": now,
+        "type": "access",
+        "jti": _random_urlsafe(16)
     })
     
-    encoded_jwt = jwt.encode(
-        to_encode,
-        settings.SECRET_KEY,
-        algorithm=settings.ALGORITHM
-    )
+    if settings.ALGORITHM == "HS256":
+        encoded_jwt = _encode_hs256(to_encode)
+    else:
+        encoded_jwt = jwt.encode(
+            to_encode,
+            _SIGNING_KEY,
+            algorithm=settings.ALGORITHM
+        )
     
     return encoded_jwt
 
@@ -60,24 +165,54 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
         Encoded refresh token
     """
     to_encode = data.copy()
+    now = datetime.now(timezone.utc)
     
-    expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    expire = now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     
     to_encode.update({
         "exp": expire,
-        "iat": datetime.utcnow(),
+        "iat": now,
         "type": "refresh",
-        "jti": secrets.token_urlsafe(32)  # Unique token ID for blacklisting
+        "jti": _random_urlsafe(16)  # Unique 128-bit token ID for blacklisting
     })
     
     encoded_jwt = jwt.encode(
         to_encode,
-        settings.SECRET_KEY,
+        _SIGNING_KEY,
         algorithm=settings.ALGORITHM
     )
     
     return encoded_jwt
 
+def _decode_cached(token: str) -> Dict[str, Any]:
+    """
+    Decode a token, reusing a previously verified payload while it is live
+    
+    Returns a fresh dict each time, so callers can't alter the cached payload
+    
+    Raises:
+        JWTError: If the token is invalid or expired
+    """
+    payload = _decode_cache.get(token)
+    if payload is not None:
+        if payload.get("exp", 0) > time.time():
+            return dict(payload)
+        raise JWTError("Signature has expired.")
+    
+    payload = jwt.decode(
+        token,
+        _SIGNING_KEY,
+        algorithms=[settings.ALGORITHM]
+    )
+    
+    # Refresh tokens are single-use in practice, so don't spend cache slots on them
+    if payload.get("type") != "refresh":
+        now = time.time()
+        expires_at = min(payload.get("exp", now), now + DECODE_CACHE_TTL_SECONDS)
+        _decode_cache.set(token, dict(payload), expires_at)
+    
+    return payload
+
 def decode_token(token: str) -> Optional[Dict[str, Any]]:
     """
     Decode and validate a JWT token
@@ -86,20 +221,20 @@ def decode_token(token: str) -> Optional[Dict[str, Any]]:
         token: The JWT token to decode
     
     Returns:
-        Decoded token payload or None if invalid
+        Decoded token payload or None if invalid or revoked
     """
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
+        payload = _decode_cached(token)
+        jti = payload.get("jti")
+        if jti is not None and _revoked_jtis.get(jti):
+            logger.info("Rejected revoked token %s", jti)
+            return None
         return payload
     except JWTError as e:
-        logger.error(f"JWT decode error: {e}")
+        logger.error("JWT decode error: %s", e)
         return None
     except Exception as e:
-        logger.error(f"Token decode error: {e}")
+        logger.error("Token decode error: %s", e)
         return None
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -112,12 +247,21 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     
     Returns:
         True if passwords match, False otherwise
+    
+    Raises:
+        ValueError: If hashed_password is neither an argon2 nor a bcrypt hash
     """
-    try:
-        return pwd_context.verify(plain_password, hashed_password)
-    except Exception as e:
-        logger.error(f"Password verification error: {e}")
-        return False
+    if hashed_password.startswith("$argon2"):
+        try:
+            return _PASSWORD_HASHER.verify(hashed_password, plain_password)
+        except VerifyMismatchError:
+            return False
+        except InvalidHashError as e:
+            raise ValueError("Invalid argon2 hash") from e
+    return bcrypt.checkpw(
+        plain_password.encode()[:_BCRYPT_MAX_BYTES],
+        hashed_password.encode()
+    )
 
 def get_password_hash(password: str) -> str:
     """
@@ -127,9 +271,9 @@ def get_password_hash(password: str) -> str:
         password: The plain text password to hash
     
     Returns:
-        Hashed password
+        Hashed password (argon2id)
     """
-    return pwd_context.hash(password)
+    return _PASSWORD_HASHER.hash(password)
 
 def generate_password_reset_token(email: str) -> str:
     """
@@ -146,12 +290,12 @@ def generate_password_reset_token(email: str) -> str:
         "type": "password_reset"
     }
     
-    expire = datetime.utcnow() + timedelta(hours=24)  # 24 hour expiration
+    expire = datetime.now(timezone.utc) + timedelta(hours=24)  # 24 hour expiration
     data.update({"exp": expire})
     
     return jwt.encode(
         data,
-        settings.SECRET_KEY,
+        _SIGNING_KEY,
         algorithm=settings.ALGORITHM
     )
 
@@ -166,11 +310,7 @@ def verify_password_reset_token(token: str) -> Optional[str]:
         Email address if valid, None otherwise
     """
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
+        payload = _decode_cached(token)
         
         if payload.get("type") != "password_reset":
             return None
@@ -194,12 +334,12 @@ def generate_email_verification_token(email: str) -> str:
         "type": "email_verification"
     }
     
-    expire = datetime.utcnow() + timedelta(days=7)  # 7 day expiration
+    expire = datetime.now(timezone.utc) + timedelta(days=7)  # 7 day expiration
     data.update({"exp": expire})
     
     return jwt.encode(
         data,
-        settings.SECRET_KEY,
+        _SIGNING_KEY,
         algorithm=settings.ALGORITHM
     )
 
@@ -214,11 +354,7 @@ def verify_email_verification_token(token: str) -> Optional[str]:
         Email address if valid, None otherwise
     """
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
+        payload = _decode_cached(token)
         
         if payload.get("type") != "email_verification":
             return None
@@ -234,7 +370,7 @@ def generate_api_key() -> str:
     Returns:
         A secure random API key
     """
-    return secrets.token_urlsafe(32)
+    return _random_urlsafe(32)
 
 def hash_api_key(api_key: str) -> str:
     """
@@ -246,8 +382,11 @@ def hash_api_key(api_key: str) -> str:
     Returns:
         Hashed API key
     """
-    # Use a different context for API keys (faster, since they're random)
-    return pwd_context.hash(api_key)
+    # API keys are high-entropy random strings, so a keyed SHA-256 is enough
+    # and avoids bcrypt's deliberate slowness on every request
+    digest = _SECRET_HMAC.copy()
+    digest.update(api_key.encode())
+    return digest.hexdigest()
 
 def verify_api_key(api_key: str, hashed_key: str) -> bool:
     """
@@ -260,7 +399,4 @@ def verify_api_key(api_key: str, hashed_key: str) -> bool:
     Returns:
         True if keys match, False otherwise
     """
-    try:
-        return pwd_context.verify(api_key, hashed_key)
-    except Exception:
-        return False
\ No newline at end of file
+    return hmac.compare_digest(hash_api_key(api_key).encode(), hashed_key.encode())
\ No newline at end of file
@@ -4,16 +4,25 @@ WebSocket connection manager for real-time updates
 Handles pet metric updates, task completions, and multi-user synchronization
 """
 
-from typing import Dict, List, Set, Optional, Any
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Tuple
 from fastapi import WebSocket, WebSocketDisconnect
-import json
+import orjson
 import asyncio
 import logging
+import time
 from datetime import datetime
 from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# Messages buffered per client before it is treated as too slow and dropped
+SEND_QUEUE_SIZE = 100
+
+def _encode(message: Dict[str, Any]) -> str:
+    """Serialize a message once with orjson (handles Enum, datetime and numpy values natively)"""
+    return orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
 class MessageType(str, Enum):
     """WebSocket message types"""
     # Connection
@@ -47,6 +56,18 @@ class MessageType(str, Enum):
     
     # Chat
     MESSAGE = "message"
+    
+    # Render as the plain value instead of going through Enum.__str__
+    __str__ = str.__str__
+
+@dataclass(slots=True)
+class ClientState:
+    """Per-client connection state, kept in a single record per client"""
+    ws: WebSocket
+    pet_id: Optional[str] = None
+    last_heartbeat: float = 0.0  # time.monotonic() of the last beat
+    send_queue: "asyncio.Queue[str]" = field(default_factory=lambda: asyncio.Queue(maxsize=SEND_QUEUE_SIZE))
+    writer: Optional[asyncio.Task] = None  # Drains send_queue into the socket
 
 class ConnectionManager:
     """
@@ -54,17 +75,15 @@ class ConnectionManager:
     """
     
     def __init__(self):
-        # Store active connections by client_id
-        self.active_connections: Dict[str, WebSocket] = {}
+        # Store connection state by client_id (socket, current pet, heartbeat, send queue)
+        self.clients: Dict[str, ClientState] = {}
         
         # Store pet rooms (multiple users can be in same pet room)
-        self.pet_rooms: Dict[str, Set[str]] = {}  # pet_id -> set of client_ids
-        
-        # Store user -> pet mapping
-        self.user_pets: Dict[str, str] = {}  # client_id -> pet_id
+        # pet_id -> {client_id: ClientState}, so room broadcasts need no per-client lookup
+        self.pet_rooms: Dict[str, Dict[str, ClientState]] = {}
         
-        # Heartbeat tracking
-        self.last_heartbeat: Dict[str, datetime] = {}
+        # Shared message timestamp, refreshed by a background ticker
+        self._ts_cache: str = datetime.now().isoformat()
         
         # Background tasks
         self.background_tasks: List[asyncio.Task] = []
@@ -72,9 +91,9 @@ class ConnectionManager:
     async def startup(self):
         """Initialize the WebSocket manager"""
         logger.info("WebSocket manager starting up...")
-        # Start heartbeat checker
-        task = asyncio.create_task(self._heartbeat_checker())
-        self.background_tasks.append(task)
+        # Start heartbeat checker and timestamp ticker
+        self.background_tasks.append(asyncio.create_task(self._heartbeat_checker()))
+        self.background_tasks.append(asyncio.create_task(self._timestamp_ticker()))
     
     async def shutdown(self):
         """Cleanup on shutdown"""
@@ -84,7 +103,7 @@ class ConnectionManager:
             task.cancel()
         
         # Close all connections
-        for client_id in list(self.active_connections.keys()):
+        for client_id in list(self.clients):
             await self.disconnect(client_id)
     
     async def connect(self, websocket: WebSocket, client_id: str, pet_id: Optional[str] = None):
@@ -97,8 +116,20 @@ class ConnectionManager:
             pet_id: Optional pet_id to join a pet room
         """
         await websocket.accept()
-        self.active_connections[client_id] = websocket
-        self.last_heartbeat[client_id] = datetime.now()
+        
+        # A reconnect replaces the previous socket: fully drop the old state
+        # (room membership, writer) and close its socket before registering
+        old_state = self.clients.get(client_id)
+        if old_state is not None:
+            await self.disconnect(client_id)
+            try:
+                await old_state.ws.close()
+            except Exception:
+                pass  # Already closed by the peer
+        
+        state = ClientState(ws=websocket, last_heartbeat=time.monotonic())
+        state.writer = asyncio.create_task(self._writer(client_id, state))
+        self.clients[client_id] = state
         
         # Join pet room if specified
         if pet_id:
@@ -111,11 +142,11 @@ class ConnectionManager:
                 "type": MessageType.CONNECT,
                 "message": "Connected successfully",
                 "client_id": client_id,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": self._ts_cache
             }
         )
         
-        logger.info(f"Client {client_id} connected")
+        logger.info("Client %s connected", client_id)
     
     async def disconnect(self, client_id: str):
         """
@@ -124,18 +155,18 @@ class ConnectionManager:
         Args:
             client_id: The client to disconnect
         """
-        if client_id in self.active_connections:
+        state = self.clients.get(client_id)
+        if state is not None:
             # Leave pet room
-            if client_id in self.user_pets:
-                pet_id = self.user_pets[client_id]
-                await self.leave_pet_room(client_id, pet_id)
+            if state.pet_id is not None:
+                await self.leave_pet_room(client_id, state.pet_id)
             
-            # Remove from tracking
-            del self.active_connections[client_id]
-            if client_id in self.last_heartbeat:
-                del self.last_heartbeat[client_id]
+            # Remove from tracking and stop the writer (unless it is the caller)
+            self.clients.pop(client_id, None)
+            if state.writer is not None and state.writer is not asyncio.current_task():
+                state.writer.cancel()
             
-            logger.info(f"Client {client_id} disconnected")
+            logger.info("Client %s disconnected", client_id)
     
     async def join_pet_room(self, client_id: str, pet_id: str):
         """
@@ -145,11 +176,17 @@ class ConnectionManager:
             client_id: The client joining the room
             pet_id: The pet room to join
         """
-        if pet_id not in self.pet_rooms:
-            self.pet_rooms[pet_id] = set()
+        state = self.clients.get(client_id)
+        if state is None:
+            return
         
-        self.pet_rooms[pet_id].add(client_id)
-        self.user_pets[client_id] = pet_id
+        # A client is in one room at a time; otherwise the old room keeps
+        # filling its queue until it is dropped as slow
+        if state.pet_id is not None and state.pet_id != pet_id:
+            await self.leave_pet_room(client_id, state.pet_id)
+        
+        self.pet_rooms.setdefault(pet_id, {})[client_id] = state
+        state.pet_id = pet_id
         
         # Notify other users in the room
         await self.broadcast_to_pet(
@@ -158,12 +195,12 @@ class ConnectionManager:
                 "type": MessageType.USER_JOINED,
                 "user_id": client_id,
                 "pet_id": pet_id,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": self._ts_cache
             },
             exclude=[client_id]
         )
         
-        logger.info(f"Client {client_id} joined pet room {pet_id}")
+        logger.info("Client %s joined pet room %s", client_id, pet_id)
     
     async def leave_pet_room(self, client_id: str, pet_id: str):
         """
@@ -173,11 +210,12 @@ class ConnectionManager:
             client_id: The client leaving the room
             pet_id: The pet room to leave
         """
-        if pet_id in self.pet_rooms and client_id in self.pet_rooms[pet_id]:
-            self.pet_rooms[pet_id].remove(client_id)
+        room = self.pet_rooms.get(pet_id)
+        if room is not None and client_id in room:
+            del room[client_id]
             
             # Clean up empty rooms
-            if not self.pet_rooms[pet_id]:
+            if not room:
                 del self.pet_rooms[pet_id]
             
             # Notify other users
@@ -187,14 +225,15 @@ class ConnectionManager:
                     "type": MessageType.USER_LEFT,
                     "user_id": client_id,
                     "pet_id": pet_id,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": self._ts_cache
                 }
             )
         
-        if client_id in self.user_pets:
-            del self.user_pets[client_id]
+        state = self.clients.get(client_id)
+        if state is not None and state.pet_id == pet_id:
+            state.pet_id = None
         
-        logger.info(f"Client {client_id} left pet room {pet_id}")
+        logger.info("Client %s left pet room %s", client_id, pet_id)
     
     async def send_personal_message(self, client_id: str, message: Dict[str, Any]):
         """
@@ -204,12 +243,9 @@ class ConnectionManager:
             client_id: The target client
             message: The message to send (will be JSON encoded)
         """
-        if client_id in self.active_connections:
-            try:
-                await self.active_connections[client_id].send_json(message)
-            except Exception as e:
-                logger.error(f"Error sending message to {client_id}: {e}")
-                await self.disconnect(client_id)
+        state = self.clients.get(client_id)
+        if state is not None:
+            await self._enqueue([(client_id, state)], _encode(message))
     
     async def broadcast(self, message: Dict[str, Any], exclude: List[str] = None):
         """
@@ -220,19 +256,11 @@ class ConnectionManager:
             exclude: List of client_ids to exclude from broadcast
         """
         exclude = exclude or []
-        disconnected = []
-        
-        for client_id, connection in self.active_connections.items():
-            if client_id not in exclude:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logger.error(f"Error broadcasting to {client_id}: {e}")
-                    disconnected.append(client_id)
-        
-        # Clean up disconnected clients
-        for client_id in disconnected:
-            await self.disconnect(client_id)
+        targets = [
+            (client_id, state) for client_id, state in self.clients.items()
+            if client_id not in exclude
+        ]
+        await self._enqueue(targets, _encode(message))
     
     async def broadcast_to_pet(self, pet_id: str, message: Dict[str, Any], exclude: List[str] = None):
         """
@@ -244,11 +272,57 @@ class ConnectionManager:
             exclude: List of client_ids to exclude
         """
         exclude = exclude or []
+        room = self.pet_rooms.get(pet_id)
+        if not room:
+            return
+        targets = [
+            (client_id, state) for client_id, state in room.items()
+            if client_id not in exclude
+        ]
+        if targets:
+            await self._enqueue(targets, _encode(message))
+    
+    async def _enqueue(self, targets: List[Tuple[str, ClientState]], payload: str):
+        """
+        Queue a pre-serialized payload for several clients without waiting on their sockets
+        
+        Args:
+            targets: (client_id, state) pairs to send to
+            payload: JSON text encoded once for all targets
+        """
+        slow_clients = []
+        for client_id, state in targets:
+            try:
+                state.send_queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                slow_clients.append((client_id, state))
         
-        if pet_id in self.pet_rooms:
-            for client_id in self.pet_rooms[pet_id]:
-                if client_id not in exclude:
-                    await self.send_personal_message(client_id, message)
+        # Drop clients that can't keep up so they don't hold messages for the room,
+        # unless the client_id has meanwhile been taken over by a newer connection
+        for client_id, state in slow_clients:
+            if self.clients.get(client_id) is state:
+                logger.warning("Client %s send queue full", client_id)
+                await self.disconnect(client_id)
+                try:
+                    await state.ws.close(code=1013)  # Try again later, so the client reconnects
+                except Exception:
+                    pass  # Already closed by the peer
+    
+    async def _writer(self, client_id: str, state: ClientState):
+        """
+        Per-client task that writes queued payloads to the socket in order
+        A slow socket only backs up its own queue, not the broadcasts to others
+        """
+        try:
+            while True:
+                payload = await state.send_queue.get()
+                await state.ws.send_text(payload)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error("Error sending message to %s: %s", client_id, e)
+            if self.clients.get(client_id) is state:
+                await self.disconnect(client_id)
     
     async def send_pet_metrics_update(self, pet_id: str, metrics: Dict[str, Any]):
         """
@@ -262,7 +336,7 @@ class ConnectionManager:
             "type": MessageType.PET_METRICS_UPDATE,
             "pet_id": pet_id,
             "metrics": metrics,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self._ts_cache
         }
         await self.broadcast_to_pet(pet_id, message)
     
@@ -279,7 +353,7 @@ class ConnectionManager:
             "type": task_type,
             "pet_id": pet_id,
             "task": task_data,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self._ts_cache
         }
         await self.broadcast_to_pet(pet_id, message)
     
@@ -296,21 +370,33 @@ class ConnectionManager:
             "type": MessageType.NOTIFICATION if priority != "critical" else MessageType.ALERT,
             "notification": notification,
             "priority": priority,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self._ts_cache
         }
         await self.send_personal_message(client_id, message)
     
     def active_connections_count(self) -> int:
         """Get the number of active connections"""
-        return len(self.active_connections)
+        return len(self.clients)
     
     def get_pet_room_users(self, pet_id: str) -> List[str]:
         """Get list of users in a pet room"""
-        return list(self.pet_rooms.get(pet_id, set()))
+        return list(self.pet_rooms.get(pet_id, ()))
     
     def get_online_users(self) -> List[str]:
         """Get list of all online users"""
-        return list(self.active_connections.keys())
+        return list(self.clients)
+    
+    async def _timestamp_ticker(self):
+        """
+        Background task that refreshes the shared message timestamp every 100ms
+        so message builders don't format a datetime per message
+        """
+        while True:
+            try:
+                await asyncio.sleep(0.1)
+                self._ts_cache = datetime.now().isoformat()
+            except asyncio.CancelledError:
+                break
     
     async def _heartbeat_checker(self):
         """
@@ -320,28 +406,29 @@ class ConnectionManager:
             try:
                 await asyncio.sleep(30)  # Check every 30 seconds
                 
-                now = datetime.now()
-                stale_clients = []
+                now = time.monotonic()
                 
-                for client_id, last_beat in self.last_heartbeat.items():
-                    # If no heartbeat for 60 seconds, consider stale
-                    if (now - last_beat).total_seconds() > 60:
-                        stale_clients.append(client_id)
+                # If no heartbeat for 60 seconds, consider stale
+                stale_clients = [
+                    client_id for client_id, state in self.clients.items()
+                    if now - state.last_heartbeat > 60
+                ]
                 
                 # Disconnect stale clients
                 for client_id in stale_clients:
-                    logger.warning(f"Client {client_id} heartbeat timeout")
+                    logger.warning("Client %s heartbeat timeout", client_id)
                     await self.disconnect(client_id)
                     
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"Error in heartbeat checker: {e}")
+                logger.error("Error in heartbeat checker: %s", e)
     
     async def handle_heartbeat(self, client_id: str):
         """Update heartbeat timestamp for a client"""
-        if client_id in self.active_connections:
-            self.last_heartbeat[client_id] = datetime.now()
+        state = self.clients.get(client_id)
+        if state is not None:
+            state.last_heartbeat = time.monotonic()
             await self.send_personal_message(
                 client_id,
                 {"type": MessageType.HEARTBEAT, "status": "alive"}
@@ -0,0 +1,179 @@
+# backend/app/db/seed_data.py
+"""
+Initial reference data for a fresh database
+Built once at import; rows are plain dicts ready for bulk_insert_mappings
+"""
+
+from typing import Any, Dict, Tuple
+
+
+INITIAL_ITEMS: Tuple[Dict[str, Any], ...] = (
+    {
+        "name": "Catnip",
+        "description": "A classic treat that makes your cat happy",
+        "item_type": "food",
+        "cost": 10,
+        "effects": {"happiness": 20, "hunger": -30, "energy": 10},
+        "icon_url": "/items/catnip.png"
+    },
+    {
+        "name": "Tuna Treat",
+        "description": "Delicious tuna that satisfies hunger",
+        "item_type": "food",
+        "cost": 15,
+        "effects": {"happiness": 15, "hunger": -40, "health": 5},
+        "icon_url": "/items/tuna.png"
+    },
+    {
+        "name": "Milk Bowl",
+        "description": "Fresh milk for your thirsty cat",
+        "item_type": "food",
+        "cost": 5,
+        "effects": {"happiness": 10, "hunger": -20, "energy": 5},
+        "icon_url": "/items/milk.png"
+    },
+    {
+        "name": "Yarn Ball",
+        "description": "A fun toy to play with",
+        "item_type": "toy",
+        "cost": 20,
+        "effects": {"happiness": 25, "energy": -15},
+        "icon_url": "/items/yarn.png",
+        "is_consumable": False
+    },
+    {
+        "name": "Feather Wand",
+        "description": "Interactive toy for playtime",
+        "item_type": "toy",
+        "cost": 25,
+        "effects": {"happiness": 30, "energy": -20},
+        "icon_url": "/items/feather.png",
+        "is_consumable": False
+    },
+    {
+        "name": "Health Potion",
+        "description": "Restores your cat's health",
+        "item_type": "medicine",
+        "cost": 30,
+        "effects": {"health": 50},
+        "icon_url": "/items/health_potion.png"
+    },
+    {
+        "name": "Energy Drink",
+        "description": "Boosts your cat's energy",
+        "item_type": "medicine",
+        "cost": 25,
+        "effects": {"energy": 40},
+        "icon_url": "/items/energy_drink.png"
+    },
+    {
+        "name": "Bow Tie",
+        "description": "A stylish accessory for your cat",
+        "item_type": "accessory",
+        "cost": 50,
+        "effects": {"happiness": 5},
+        "icon_url": "/items/bowtie.png",
+        "is_consumable": False
+    },
+)
+
+
+INITIAL_ACHIEVEMENTS: Tuple[Dict[str, Any], ...] = (
+    # Care achievements
+    {
+        "name": "First Feed",
+        "description": "Feed your pet for the first time",
+        "category": "care",
+        "requirements": {"feeds": 1},
+        "currency_reward": 10,
+        "experience_reward": 5,
+        "rarity": "common"
+    },
+    {
+        "name": "Caring Owner",
+        "description": "Feed your pet 100 times",
+        "category": "care",
+        "requirements": {"feeds": 100},
+        "currency_reward": 100,
+        "experience_reward": 50,
+        "rarity": "rare"
+    },
+    {
+        "name": "Pet Whisperer",
+        "description": "Pet your cat 50 times",
+        "category": "care",
+        "requirements": {"pets": 50},
+        "currency_reward": 50,
+        "experience_reward": 25,
+        "rarity": "common"
+    },
+    
+    # Task achievements
+    {
+        "name": "Task Master",
+        "description": "Complete 10 tasks",
+        "category": "tasks",
+        "requirements": {"tasks_completed": 10},
+        "currency_reward": 50,
+        "experience_reward": 25,
+        "rarity": "common"
+    },
+    {
+        "name": "Productivity Pro",
+        "description": "Complete 100 tasks",
+        "category": "tasks",
+        "requirements": {"tasks_completed": 100},
+        "currency_reward": 200,
+        "experience_reward": 100,
+        "rarity": "epic"
+    },
+    {
+        "name": "Streak Champion",
+        "description": "Maintain a 7-day task streak",
+        "category": "tasks",
+        "requirements": {"streak_days": 7},
+        "currency_reward": 100,
+        "experience_reward": 50,
+        "rarity": "rare"
+    },
+    
+    # Social achievements
+    {
+        "name": "Team Player",
+        "description": "Share your pet with another user",
+        "category": "social",
+        "requirements": {"co_owners": 1},
+        "currency_reward": 30,
+        "experience_reward": 15,
+        "rarity": "common"
+    },
+    {
+        "name": "Social Butterfly",
+        "description": "Share pets with 5 different users",
+        "category": "social",
+        "requirements": {"unique_co_owners": 5},
+        "currency_reward": 150,
+        "experience_reward": 75,
+        "rarity": "epic"
+    },
+    
+    # Milestones
+    {
+        "name": "Week One",
+        "description": "Keep your pet alive for 7 days",
+        "category": "milestones",
+        "requirements": {"days_alive": 7},
+        "currency_reward": 100,
+        "experience_reward": 50,
+        "rarity": "common"
+    },
+    {
+        "name": "Monthly Milestone",
+        "description": "Keep your pet alive for 30 days",
+        "category": "milestones",
+        "requirements": {"days_alive": 30},
+        "currency_reward": 500,
+        "experience_reward": 250,
+        "rarity": "legendary"
+    },
+)
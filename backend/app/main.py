@@ -2,10 +2,22 @@
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
+from fastapi.responses import ORJSONResponse, Response
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import asynccontextmanager
+import asyncio
 import logging
+import orjson
+import os
 from typing import Dict, Any
-from app.core.database import init_db
+from app.core.config import settings
+from app.core.database import async_engine, create_pool, init_db, start_listener
+from app.core.websocket import websocket_manager
+from app.models import REFERENCE_CHANNEL, clear_reference_registry
 
 # Configure logging
 logging.basicConfig(
@@ -14,15 +26,55 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# OpenAPI schema URL (schema is built once at startup and served pre-serialized)
+OPENAPI_URL = "/openapi.json"
+
+# Seconds to wait for checked-out asyncpg connections at shutdown before terminating
+POOL_CLOSE_TIMEOUT = 10
+
 # Lifespan context manager for startup/shutdown events
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("🐱 Purretys API starting up...")
     init_db()  # Initialize database tables
-    yield
-    # Shutdown
-    logger.info("Purretys API shutting down...")
+    app.state.pool = await create_pool()  # Shared asyncpg pool for raw reads
+    app.state.reference_listener = None
+    app.state.hash_pool = None
+    redis = None
+    try:
+        if app.state.pool is not None:  # Drop cached Item/Achievement registries when they change
+            app.state.reference_listener = await start_listener(
+                app.state.pool, REFERENCE_CHANNEL, clear_reference_registry
+            )
+        async with async_engine.connect():  # Open the first engine connection before serving
+            pass
+        app.state.hash_pool = ProcessPoolExecutor(max_workers=os.cpu_count())  # CPU-bound password hashing
+        redis = aioredis.from_url(settings.REDIS_URL, password=settings.REDIS_PASSWORD)
+        FastAPICache.init(RedisBackend(redis), prefix="purretys")  # Response cache for pet reads
+        app.state.openapi_bytes = orjson.dumps(app.openapi())
+        await websocket_manager.startup()  # Heartbeat checker and message timestamp ticker
+        yield
+    finally:
+        # Shutdown; also runs if startup or serving fails, so pools and worker processes don't leak
+        logger.info("Purretys API shutting down...")
+        await websocket_manager.shutdown()
+        if app.state.hash_pool is not None:
+            app.state.hash_pool.shutdown(wait=False, cancel_futures=True)
+        if app.state.pool is not None:
+            if app.state.reference_listener is not None:
+                await app.state.pool.release(app.state.reference_listener)  # Reset drops the LISTEN
+            try:
+                await asyncio.wait_for(app.state.pool.close(), timeout=POOL_CLOSE_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("asyncpg pool did not close in %ss, terminating", POOL_CLOSE_TIMEOUT)
+                app.state.pool.terminate()
+        await async_engine.dispose()
+        if redis is not None:
+            try:
+                await redis.close()  # redis<5 (pinned by fastapi-cache2) has no aclose()
+            except Exception as e:
+                logger.warning("Failed to close Redis connection: %s", e)
 
 
 # Create FastAPI instance
@@ -30,21 +82,34 @@ app = FastAPI(
     title="Purretys API",
     description="Backend API for the collaborative virtual pet care game",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # orjson serializer for all responses
+    openapi_url=None  # Replaced by the precomputed schema routes below
 )
 
-# Configure CORS with simple origins
+# OpenAPI schema and docs served from the precomputed schema
+@app.get(OPENAPI_URL, include_in_schema=False)
+async def openapi_schema() -> Response:
+    """Serve the OpenAPI schema serialized once at startup"""
+    return Response(app.state.openapi_bytes, media_type="application/json")
+
+@app.get("/docs", include_in_schema=False)
+async def swagger_ui():
+    """Swagger UI backed by the precomputed schema"""
+    return get_swagger_ui_html(openapi_url=OPENAPI_URL, title=f"{app.title} - Swagger UI")
+
+@app.get("/redoc", include_in_schema=False)
+async def redoc():
+    """ReDoc backed by the precomputed schema"""
+    return get_redoc_html(openapi_url=OPENAPI_URL, title=f"{app.title} - ReDoc")
+
+# Configure CORS from settings (parsed once; origins as a set for O(1) matching)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:5173",  # Vite dev server
-        "http://localhost:3000",  # Alternative React port
-        "http://127.0.0.1:5173",
-        "http://127.0.0.1:3000",
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=frozenset(settings.cors_origins),
+    allow_credentials=settings.CORS_ALLOW_CREDENTIALS,
+    allow_methods=settings.cors_allow_methods,
+    allow_headers=settings.cors_allow_headers,
 )
 
 # Root endpoint
@@ -1,16 +1,75 @@
 # backend/app/models/__init__.py
 """
 Additional database models for the Purretys application
-This file contains: Item, Inventory, Transaction, Message, Notification, Achievement models
+This file contains: Item, Inventory, Transaction, Message, Notification (and their body tables), Achievement models
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum, JSON, Float
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Float, Index, DDL, FetchedValue, UniqueConstraint, event, false, insert, literal_column, select, text, true
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from typing import Any, Dict, List, NamedTuple
+from collections import namedtuple
 import enum
+import secrets
 from datetime import datetime
 
 from app.core.database import Base
+from app.models.types import (
+    PARTITIONED, JSONDocument, SmallIntEnum, brin_index, enum_check, monthly_partitions, track_updated_at
+)
+
+
+# ==================== Reference data cache ====================
+
+# NOTIFY channel raised when a reference table changes; payload is the table name
+REFERENCE_CHANNEL = "reference_data_changed"
+
+
+class Registry(NamedTuple):
+    """In-process snapshot of a small reference table"""
+    by_id: Dict[int, Any]
+    by_name: Dict[str, Any]
+
+
+class ReferenceRegistryMixin:
+    """
+    Loads a small, mostly static table once per process and serves lookups
+    from memory until registry_clear() is called (on NOTIFY or after writes)
+    
+    Entries are immutable named tuples of the column values, not ORM instances,
+    so they outlive the session that loaded them and are safe to share
+    """
+    _registry_cache: Dict[str, Registry] = {}
+    
+    @classmethod
+    async def registry(cls, session: AsyncSession) -> Registry:
+        cached = cls._registry_cache.get(cls.__tablename__)
+        if cached is None:
+            attrs = cls.__mapper__.column_attrs
+            row_type = namedtuple(f"{cls.__name__}Row", [attr.key for attr in attrs])
+            result = await session.execute(select(*(getattr(cls, attr.key) for attr in attrs)))
+            rows = [row_type(*row) for row in result]
+            cached = Registry(
+                by_id={row.id: row for row in rows},
+                by_name={row.name: row for row in rows}
+            )
+            cls._registry_cache[cls.__tablename__] = cached
+        return cached
+    
+    @classmethod
+    def registry_clear(cls) -> None:
+        cls._registry_cache.pop(cls.__tablename__, None)
+
+
+def clear_reference_registry(table_name: str) -> None:
+    """Drop the cached registry for a table (NOTIFY payload), or all when unknown"""
+    if table_name in ReferenceRegistryMixin._registry_cache:
+        del ReferenceRegistryMixin._registry_cache[table_name]
+    else:
+        ReferenceRegistryMixin._registry_cache.clear()
 
 
 # ==================== Items & Inventory ====================
@@ -24,7 +83,7 @@ class ItemType(enum.Enum):
     SPECIAL = "special"
 
 
-class Item(Base):
+class Item(ReferenceRegistryMixin, Base):
     """
     Items that can be purchased and used in the game
     """
@@ -35,30 +94,40 @@ class Item(Base):
     # Item information
     name = Column(String(100), unique=True, nullable=False)
     description = Column(Text, nullable=True)
-    item_type = Column(Enum(ItemType), nullable=False, index=True)
+    item_type = Column(SmallIntEnum(ItemType), nullable=False, index=True)
     
     # Cost and availability
     cost = Column(Integer, nullable=False)
-    is_available = Column(Boolean, default=True, nullable=False)
-    unlock_level = Column(Integer, default=1, nullable=False)  # Required pet level
+    is_available = Column(Boolean, server_default=true(), nullable=False)
+    unlock_level = Column(Integer, server_default=text("1"), nullable=False)  # Required pet level
     
     # Effects (JSON object with metric changes)
-    effects = Column(JSON, nullable=False)  # e.g., {"happiness": 20, "hunger": -30}
-    duration = Column(Integer, default=0, nullable=False)  # Effect duration in minutes (0 = instant)
+    effects = Column(JSONDocument, nullable=False)  # e.g., {"happiness": 20, "hunger": -30}
+    duration = Column(Integer, server_default=text("0"), nullable=False)  # Effect duration in minutes (0 = instant)
     
     # Visual
     icon_url = Column(String(500), nullable=True)
     
     # Special properties
-    is_consumable = Column(Boolean, default=True, nullable=False)
-    max_stack = Column(Integer, default=99, nullable=False)
-    cooldown = Column(Integer, default=0, nullable=False)  # Cooldown in minutes
+    is_consumable = Column(Boolean, server_default=true(), nullable=False)
+    max_stack = Column(Integer, server_default=text("99"), nullable=False)
+    cooldown = Column(Integer, server_default=text("0"), nullable=False)  # Cooldown in minutes
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
+    # Keep stored enum codes in range
+    __table_args__ = (
+        enum_check("item_type", ItemType, "ck_items_item_type"),
+    )
+    
     # Relationships
-    inventory_items = relationship("Inventory", back_populates="item")
+    inventory_items = relationship(
+        "Inventory",
+        back_populates="item",
+        passive_deletes=True,
+        lazy="raise_on_sql"  # Every pet holding this item; query it explicitly
+    )
 
 
 class Inventory(Base):
@@ -70,15 +139,20 @@ class Inventory(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     
     # Foreign keys
-    pet_id = Column(Integer, ForeignKey("pets.id"), nullable=False, index=True)
+    pet_id = Column(Integer, ForeignKey("pets.id"), nullable=False)
     item_id = Column(Integer, ForeignKey("items.id"), nullable=False)
     
+    # One inventory row per (pet, item); also serves pet_id-only lookups
+    __table_args__ = (
+        Index("ix_inventory_pet_item", pet_id, item_id, unique=True),
+    )
+    
     # Quantity
-    quantity = Column(Integer, default=1, nullable=False)
+    quantity = Column(Integer, server_default=text("1"), nullable=False)
     
     # Usage tracking
     last_used_at = Column(DateTime(timezone=True), nullable=True)
-    total_used = Column(Integer, default=0, nullable=False)
+    total_used = Column(Integer, server_default=text("0"), nullable=False)
     
     # Timestamps
     acquired_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -110,12 +184,12 @@ class Transaction(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     
     # Foreign keys
-    pet_id = Column(Integer, ForeignKey("pets.id"), nullable=False, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    pet_id = Column(Integer, ForeignKey("pets.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Transaction details
     amount = Column(Integer, nullable=False)  # Positive for earning, negative for spending
-    transaction_type = Column(Enum(TransactionType), nullable=False, index=True)
+    transaction_type = Column(SmallIntEnum(TransactionType), nullable=False, index=True)
     description = Column(String(255), nullable=False)
     
     # Related entities (optional)
@@ -125,8 +199,28 @@ class Transaction(Base):
     # Balance after transaction
     balance_after = Column(Integer, nullable=False)
     
-    # Timestamp
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    # Timestamp (partition key, so part of the primary key when partitioned)
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=text("CURRENT_TIMESTAMP"),
+        nullable=False,
+        primary_key=PARTITIONED
+    )
+    
+    # Composite indexes for per-pet history and per-user filtered history
+    # (these also cover lookups on pet_id / user_id alone)
+    __table_args__ = (
+        Index(
+            "ix_tx_pet_created",
+            pet_id,
+            created_at.desc(),
+            postgresql_include=["amount", "transaction_type", "balance_after"]  # Index-only history pages
+        ),
+        Index("ix_tx_user_type_created", user_id, transaction_type, created_at),
+        enum_check("transaction_type", TransactionType, "ck_transactions_transaction_type"),
+        brin_index("ix_tx_created_brin", created_at),
+        monthly_partitions("created_at"),
+    )
     
     # Relationships
     pet = relationship("Pet", back_populates="transactions")
@@ -140,33 +234,57 @@ class Message(Base):
     In-app messages between pet co-owners
     """
     __tablename__ = "messages"
+    __mapper_args__ = {"eager_defaults": True}  # Fetch the trigger-set updated_at on UPDATE
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     
     # Foreign keys
-    pet_id = Column(Integer, ForeignKey("pets.id"), nullable=False, index=True)
+    pet_id = Column(Integer, ForeignKey("pets.id", ondelete="CASCADE"), nullable=False, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
-    # Message content
-    content = Column(Text, nullable=False)
-    
     # Mentions
-    mentioned_users = Column(JSON, nullable=True)  # Array of user_ids mentioned
+    mentioned_users = Column(JSONDocument, nullable=True)  # Array of user_ids mentioned
     
     # Status
-    is_edited = Column(Boolean, default=False, nullable=False)
-    is_deleted = Column(Boolean, default=False, nullable=False)
+    is_edited = Column(Boolean, server_default=false(), nullable=False)
+    is_deleted = Column(Boolean, server_default=false(), nullable=False)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP"), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_onupdate=FetchedValue(), nullable=True)  # Set by trigger
     
     # Read receipts (JSON array of {user_id, read_at})
-    read_receipts = Column(JSON, nullable=True)
+    read_receipts = Column(JSONDocument, nullable=True)
+    
+    # GIN index for containment queries such as mentioned_users @> '[42]' (PostgreSQL)
+    __table_args__ = (
+        Index("ix_msg_mentions_gin", mentioned_users, postgresql_using="gin").ddl_if(dialect="postgresql"),
+        brin_index("ix_msg_created_brin", created_at),
+    )
     
     # Relationships
     pet = relationship("Pet", back_populates="messages")
     user = relationship("User", back_populates="messages")
+    
+    # Message text lives in message_bodies to keep this row narrow; load it
+    # explicitly with selectinload(Message.body) on detail reads
+    body = relationship(
+        "MessageBody",
+        uselist=False,
+        lazy="raise",
+        cascade="all, delete-orphan"
+    )
+    content = association_proxy("body", "content", creator=lambda content: MessageBody(content=content))
+
+
+class MessageBody(Base):
+    """
+    Text of a Message, split off the hot row
+    """
+    __tablename__ = "message_bodies"
+    
+    message_id = Column(Integer, ForeignKey("messages.id", ondelete="CASCADE"), primary_key=True)
+    content = Column(Text, nullable=False)
 
 
 class NotificationType(enum.Enum):
@@ -184,6 +302,23 @@ class NotificationType(enum.Enum):
     SYSTEM = "system"
 
 
+# Alert-style types where one pending notice per user and pet is enough;
+# the others (mentions, task updates, rewards, ...) legitimately pile up
+DEDUPED_NOTIFICATION_TYPES = frozenset({
+    NotificationType.PET_HUNGRY,
+    NotificationType.PET_SAD,
+    NotificationType.PET_SICK,
+})
+_DEDUPED_CODES = ", ".join(
+    str(code) for code, member in enumerate(NotificationType) if member in DEDUPED_NOTIFICATION_TYPES
+)
+# Predicate of the dedupe index, per dialect (SmallIntEnum stores the member's position)
+_PENDING_DEDUPED = {
+    "postgresql": f"is_read = false AND notification_type IN ({_DEDUPED_CODES})",
+    "sqlite": f"is_read = 0 AND notification_type IN ({_DEDUPED_CODES})",
+}
+
+
 class Notification(Base):
     """
     User notifications
@@ -193,37 +328,143 @@ class Notification(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     
     # Foreign keys
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     pet_id = Column(Integer, ForeignKey("pets.id"), nullable=True)
     
     # Notification details
-    notification_type = Column(Enum(NotificationType), nullable=False, index=True)
+    notification_type = Column(SmallIntEnum(NotificationType), nullable=False, index=True)
     title = Column(String(200), nullable=False)
-    content = Column(Text, nullable=False)
     
     # Priority
-    priority = Column(String(20), default="normal", nullable=False)  # low, normal, high, critical
+    priority = Column(String(20), server_default=text("'normal'"), nullable=False)  # low, normal, high, critical
     
     # Status
-    is_read = Column(Boolean, default=False, nullable=False, index=True)
+    is_read = Column(Boolean, server_default=false(), nullable=False)
     read_at = Column(DateTime(timezone=True), nullable=True)
     
     # Action URL (for navigation)
     action_url = Column(String(255), nullable=True)
     
     # Additional data
-    data = Column(JSON, nullable=True)
+    data = Column(JSONDocument, nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP"), nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=True)
     
     # Push notification status
-    push_sent = Column(Boolean, default=False, nullable=False)
+    push_sent = Column(Boolean, server_default=false(), nullable=False)
     push_sent_at = Column(DateTime(timezone=True), nullable=True)
     
+    # Composite indexes for "user's notifications by read state, newest first"
+    # plus a partial index holding only unread rows and a GIN index on data (PostgreSQL)
+    __table_args__ = (
+        Index(
+            "ix_notif_user_unread_created",
+            user_id,
+            is_read,
+            created_at.desc(),
+            postgresql_include=["title", "priority"]  # Index-only notification list pages
+        ),
+        Index(
+            "ix_notif_user_unread",
+            user_id,
+            created_at,
+            postgresql_where=text("is_read = false")
+        ),
+        enum_check("notification_type", NotificationType, "ck_notifications_notification_type"),
+        Index("ix_notif_data_gin", data, postgresql_using="gin").ddl_if(dialect="postgresql"),
+        brin_index("ix_notif_created_brin", created_at),
+        # At most one unread alert of a deduped type per user and pet (dedupe target);
+        # COALESCE so user-level alerts without a pet are deduped too
+        Index(
+            "uq_notif_user_type_pending",
+            user_id,
+            notification_type,
+            func.coalesce(pet_id, literal_column("0")),
+            unique=True,
+            postgresql_where=text(_PENDING_DEDUPED["postgresql"]),
+            sqlite_where=text(_PENDING_DEDUPED["sqlite"])
+        ),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="notifications")
+    
+    # Notification text lives in notification_bodies so list pages stay narrow;
+    # load it explicitly with selectinload(Notification.body) on detail reads
+    body = relationship(
+        "NotificationBody",
+        uselist=False,
+        lazy="raise",
+        cascade="all, delete-orphan"
+    )
+    content = association_proxy("body", "content", creator=lambda content: NotificationBody(content=content))
+    
+    @classmethod
+    async def bulk_upsert(cls, session: AsyncSession, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        Insert notifications in bulk, skipping DEDUPED_NOTIFICATION_TYPES rows that
+        duplicate a pending (unread) alert, then insert the bodies of the new ones
+        
+        Within one batch the first of several duplicate alerts wins.
+        
+        Returns:
+            IDs of the newly created notifications
+        """
+        if not rows:
+            return []
+        
+        alerts = {}
+        alert_contents = {}
+        others = []
+        other_contents = []
+        for row in rows:
+            row = dict(row)
+            content = row.pop("content")
+            notification_type = NotificationType(row["notification_type"])
+            if notification_type in DEDUPED_NOTIFICATION_TYPES:
+                key = (row["user_id"], notification_type, row.get("pet_id") or 0)
+                if key not in alerts:
+                    alerts[key] = row
+                    alert_contents[key] = content
+            else:
+                others.append(row)
+                other_contents.append(content)
+        
+        bodies = []
+        if others:
+            result = await session.execute(
+                insert(cls).returning(cls.id, sort_by_parameter_order=True), others
+            )
+            bodies.extend(zip(result.scalars(), other_contents))
+        
+        if alerts:
+            dialect = session.bind.dialect.name
+            stmt = postgresql.insert(cls) if dialect == "postgresql" else sqlite.insert(cls)
+            stmt = stmt.values(list(alerts.values())).on_conflict_do_nothing(
+                index_elements=[cls.user_id, cls.notification_type, func.coalesce(cls.pet_id, literal_column("0"))],
+                index_where=text(_PENDING_DEDUPED[dialect])
+            ).returning(cls.id, cls.user_id, cls.notification_type, cls.pet_id)
+            for id_, user_id, notification_type, pet_id in (await session.execute(stmt)).all():
+                bodies.append((id_, alert_contents[(user_id, notification_type, pet_id or 0)]))
+        
+        if bodies:
+            await session.execute(
+                NotificationBody.__table__.insert(),
+                [{"notification_id": id_, "content": content} for id_, content in bodies]
+            )
+        return [id_ for id_, _ in bodies]
+
+
+class NotificationBody(Base):
+    """
+    Text of a Notification, split off the hot row
+    """
+    __tablename__ = "notification_bodies"
+    
+    notification_id = Column(Integer, ForeignKey("notifications.id", ondelete="CASCADE"), primary_key=True)
+    content = Column(Text, nullable=False)
 
 
 # ==================== Achievements ====================
@@ -238,7 +479,7 @@ class AchievementCategory(enum.Enum):
     SPECIAL = "special"
 
 
-class Achievement(Base):
+class Achievement(ReferenceRegistryMixin, Base):
     """
     Achievement definitions
     """
@@ -249,36 +490,51 @@ class Achievement(Base):
     # Achievement information
     name = Column(String(100), unique=True, nullable=False)
     description = Column(Text, nullable=False)
-    category = Column(Enum(AchievementCategory), nullable=False, index=True)
+    category = Column(SmallIntEnum(AchievementCategory), nullable=False, index=True)
     
     # Requirements (JSON object with conditions)
-    requirements = Column(JSON, nullable=False)  # e.g., {"tasks_completed": 100}
+    requirements = Column(JSONDocument, nullable=False)  # e.g., {"tasks_completed": 100}
     
     # Rewards
-    currency_reward = Column(Integer, default=0, nullable=False)
-    experience_reward = Column(Integer, default=0, nullable=False)
+    currency_reward = Column(Integer, server_default=text("0"), nullable=False)
+    experience_reward = Column(Integer, server_default=text("0"), nullable=False)
     item_reward_id = Column(Integer, ForeignKey("items.id"), nullable=True)
     
     # Visual
     icon_url = Column(String(500), nullable=True)
-    badge_color = Column(String(20), default="bronze", nullable=False)
+    badge_color = Column(String(20), server_default=text("'bronze'"), nullable=False)
     
     # Rarity
-    rarity = Column(String(20), default="common", nullable=False)  # common, rare, epic, legendary
-    points = Column(Integer, default=10, nullable=False)  # Achievement points
+    rarity = Column(String(20), server_default=text("'common'"), nullable=False)  # common, rare, epic, legendary
+    points = Column(Integer, server_default=text("10"), nullable=False)  # Achievement points
     
     # Availability
-    is_active = Column(Boolean, default=True, nullable=False)
-    is_secret = Column(Boolean, default=False, nullable=False)
+    is_active = Column(Boolean, server_default=true(), nullable=False)
+    is_secret = Column(Boolean, server_default=false(), nullable=False)
     
     # Order
-    display_order = Column(Integer, default=0, nullable=False)
+    display_order = Column(Integer, server_default=text("0"), nullable=False)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
+    # Keep stored enum codes in range
+    __table_args__ = (
+        enum_check("category", AchievementCategory, "ck_achievements_category"),
+        # Expression index on the common numeric requirement (PostgreSQL)
+        Index(
+            "ix_ach_tasks_completed_req",
+            requirements["tasks_completed"].as_integer()
+        ).ddl_if(dialect="postgresql"),
+    )
+    
     # Relationships
-    user_achievements = relationship("UserAchievement", back_populates="achievement")
+    user_achievements = relationship(
+        "UserAchievement",
+        back_populates="achievement",
+        passive_deletes=True,
+        lazy="raise_on_sql"  # Every user who unlocked it; query it explicitly
+    )
 
 
 class UserAchievement(Base):
@@ -286,34 +542,68 @@ class UserAchievement(Base):
     User achievement progress and unlocks
     """
     __tablename__ = "user_achievements"
+    __mapper_args__ = {"eager_defaults": True}  # Fetch the trigger-set updated_at on UPDATE
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     
     # Foreign keys
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     achievement_id = Column(Integer, ForeignKey("achievements.id"), nullable=False, index=True)
     pet_id = Column(Integer, ForeignKey("pets.id"), nullable=True)  # Associated pet if applicable
     
     # Progress
-    progress = Column(JSON, nullable=True)  # JSON object tracking progress
-    progress_percentage = Column(Float, default=0.0, nullable=False)
+    progress = Column(JSONDocument, nullable=True)  # JSON object tracking progress
+    progress_percentage = Column(Float, server_default=text("0.0"), nullable=False)
     
     # Unlock status
-    is_unlocked = Column(Boolean, default=False, nullable=False, index=True)
+    is_unlocked = Column(Boolean, server_default=false(), nullable=False)
     unlocked_at = Column(DateTime(timezone=True), nullable=True)
     
     # Notification sent
-    notification_sent = Column(Boolean, default=False, nullable=False)
+    notification_sent = Column(Boolean, server_default=false(), nullable=False)
     
     # Timestamps
     started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_onupdate=FetchedValue(), nullable=True)  # Set by trigger
+    
+    # Composite indexes for a user's unlocked / in-progress achievements and
+    # one progress row per (user, achievement)
+    __table_args__ = (
+        Index("ix_ua_user_unlocked", user_id, is_unlocked),
+        Index("ix_ua_user_ach", user_id, achievement_id, unique=True),
+    )
     
     # Relationships
     user = relationship("User", back_populates="achievements")
     achievement = relationship("Achievement", back_populates="user_achievements")
 
 
+# Notify listeners whenever a reference table changes (PostgreSQL)
+event.listen(
+    Item.__table__,
+    "after_create",
+    DDL(
+        "CREATE OR REPLACE FUNCTION notify_reference_change() RETURNS trigger AS $$ "
+        f"BEGIN PERFORM pg_notify('{REFERENCE_CHANNEL}', TG_TABLE_NAME); RETURN NULL; END; "
+        "$$ LANGUAGE plpgsql"
+    ).execute_if(dialect="postgresql")
+)
+for _table in (Item.__table__, Achievement.__table__):
+    event.listen(
+        _table,
+        "after_create",
+        DDL(
+            f"CREATE TRIGGER trg_{_table.name}_notify AFTER INSERT OR UPDATE OR DELETE ON {_table.name} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION notify_reference_change()"
+        ).execute_if(dialect="postgresql")
+    )
+
+
+# Server-side updated_at stamping
+track_updated_at(Message.__table__)
+track_updated_at(UserAchievement.__table__)
+
+
 # ==================== Pet Invitations ====================
 
 class InvitationStatus(enum.Enum):
@@ -336,24 +626,34 @@ class PetInvitation(Base):
     # Foreign keys
     pet_id = Column(Integer, ForeignKey("pets.id"), nullable=False, index=True)
     inviter_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    invitee_email = Column(String(255), nullable=False, index=True)
+    invitee_email = Column(String(255), nullable=False)
     invitee_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # Set when user found
     
     # Invitation details
-    role = Column(String(20), default="co-owner", nullable=False)
+    role = Column(String(20), server_default=text("'co-owner'"), nullable=False)
     message = Column(Text, nullable=True)
     
     # Status
-    status = Column(Enum(InvitationStatus), default=InvitationStatus.PENDING, nullable=False, index=True)
+    status = Column(SmallIntEnum(InvitationStatus), default=InvitationStatus.PENDING, nullable=False, index=True)
     
-    # Invitation token (for email invites)
-    invitation_token = Column(String(255), unique=True, nullable=False)
+    # Invitation token (for email invites): 128-bit random, 22 base64url chars
+    invitation_token = Column(String(22), default=lambda: secrets.token_urlsafe(16), nullable=False)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=False)
     responded_at = Column(DateTime(timezone=True), nullable=True)
     
+    # Composite index for pending-invite lookups by email
+    __table_args__ = (
+        Index("ix_inv_email_status", invitee_email, status),
+        # Tokens are only looked up by equality, which the hash index serves; PostgreSQL
+        # hash indexes can't be unique, so the constraint still guarantees uniqueness
+        UniqueConstraint("invitation_token", name="uq_inv_token"),
+        Index("ix_inv_token_hash", invitation_token, postgresql_using="hash"),
+        enum_check("status", InvitationStatus, "ck_pet_invitations_status"),
+    )
+    
     # Relationships
     inviter = relationship("User", foreign_keys=[inviter_id])
     invitee = relationship("User", foreign_keys=[invitee_id])
@@ -369,7 +669,8 @@ from app.models.pet import (
 )
 from app.models.task import (
     Task, TaskAssignment, TaskCompletion, TaskComment,
-    TaskCategory, TaskDifficulty, TaskStatus, RecurrencePattern
+    TaskCategory, TaskDifficulty, TaskStatus, RecurrencePattern,
+    TASK_CATEGORIES, TASK_DIFFICULTIES, TASK_STATUSES, RECURRENCE_PATTERNS
 )
 
 __all__ = [
@@ -394,6 +695,10 @@ __all__ = [
     "TaskDifficulty",
     "TaskStatus",
     "RecurrencePattern",
+    "TASK_CATEGORIES",
+    "TASK_DIFFICULTIES",
+    "TASK_STATUSES",
+    "RECURRENCE_PATTERNS",
     
     # Item and inventory
     "Item",
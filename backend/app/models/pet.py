@@ -3,13 +3,70 @@
 Pet model and related tables for the virtual pet system
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text, Enum, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text, JSON, DDL, FetchedValue, Index, event, insert, inspect, select, literal, text, true, false, tuple_, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 import enum
+import numpy as np
 from datetime import datetime
 
 from app.core.database import Base
+from app.models.types import (
+    PARTITIONED, JSONDocument, SmallIntEnum, brin_index, enum_check, monthly_partitions, track_updated_at
+)
+
+
+# Rows per INSERT statement for append-only log tables
+BULK_INSERT_BATCH_SIZE = 1000
+
+
+async def _bulk_insert(session: AsyncSession, model, rows: List[Dict[str, Any]]) -> None:
+    """
+    Insert rows with Core executemany in fixed-size batches, skipping ORM
+    object construction and per-row flushes
+    """
+    for start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+        await session.execute(insert(model), rows[start:start + BULK_INSERT_BATCH_SIZE])
+
+
+# Rows per round trip when streaming a log table
+STREAM_CHUNK_SIZE = 1000
+
+
+# SQLite keeps DateTime as text: CURRENT_TIMESTAMP defaults have no fractional
+# part while bound datetimes do, so a plain comparison is between unlike strings
+_SQLITE_SEEK_FORMAT = "%Y-%m-%d %H:%M:%f"
+
+
+def _pet_log_query(
+    model, column, pet_id: int, before: Optional[Tuple[datetime, int]], dialect: str = ""
+):
+    """
+    A pet's log rows newest first, seeking past the (timestamp, id) cursor
+    instead of OFFSET so every page costs the same
+    """
+    cursor_ts = before[0] if before is not None else None
+    if dialect == "sqlite":
+        # Order and seek on one canonical text form of both sides
+        column = func.strftime(_SQLITE_SEEK_FORMAT, column)
+        if before is not None:
+            cursor_ts = func.strftime(_SQLITE_SEEK_FORMAT, literal(cursor_ts, DateTime()))
+    
+    stmt = select(model).where(model.pet_id == pet_id)
+    if before is not None:
+        stmt = stmt.where(tuple_(column, model.id) < tuple_(cursor_ts, before[1]))
+    return stmt.order_by(column.desc(), model.id.desc())
+
+
+async def _stream_rows(session: AsyncSession, stmt) -> AsyncIterator[Any]:
+    """Yield ORM rows fetched STREAM_CHUNK_SIZE at a time (exports)"""
+    result = await session.stream_scalars(stmt.execution_options(yield_per=STREAM_CHUNK_SIZE))
+    async for row in result:
+        yield row
 
 
 class PetState(enum.Enum):
@@ -37,94 +94,124 @@ class Pet(Base):
     Pet model representing virtual cats
     """
     __tablename__ = "pets"
+    __mapper_args__ = {"eager_defaults": True}  # Fetch the trigger-set updated_at on UPDATE
     
     # Primary key
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     
     # Basic information
     name = Column(String(50), nullable=False)
-    sprite_id = Column(Integer, default=1, nullable=False)  # Visual appearance ID
-    color = Column(String(20), default="orange", nullable=False)  # Pet color customization
+    sprite_id = Column(Integer, server_default=text("1"), nullable=False)  # Visual appearance ID
+    color = Column(String(20), server_default=text("'orange'"), nullable=False)  # Pet color customization
     
     # Growth and state
-    stage = Column(Enum(PetStage), default=PetStage.KITTEN, nullable=False)
-    current_state = Column(Enum(PetState), default=PetState.NEUTRAL, nullable=False)
-    level = Column(Integer, default=1, nullable=False)
-    experience_points = Column(Integer, default=0, nullable=False)
+    stage = Column(SmallIntEnum(PetStage), default=PetStage.KITTEN, nullable=False)
+    current_state = Column(SmallIntEnum(PetState), default=PetState.NEUTRAL, nullable=False)
+    level = Column(Integer, server_default=text("1"), nullable=False)
+    experience_points = Column(Integer, server_default=text("0"), nullable=False)
     
     # Creation info
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_onupdate=FetchedValue(), nullable=True)  # Set by trigger
     
     # Pet status
-    is_active = Column(Boolean, default=True, nullable=False)
-    is_sleeping = Column(Boolean, default=False, nullable=False)
+    is_active = Column(Boolean, server_default=true(), nullable=False)
+    is_sleeping = Column(Boolean, server_default=false(), nullable=False)
     last_fed_at = Column(DateTime(timezone=True), nullable=True)
     last_played_at = Column(DateTime(timezone=True), nullable=True)
     last_petted_at = Column(DateTime(timezone=True), nullable=True)
     
+    # Denormalized read copy of the hot PetMetrics fields, kept in sync by a
+    # trigger on pet_metrics so dashboard reads don't need the join
+    happiness = Column(Float, server_default=text("50.0"), nullable=False)
+    hunger = Column(Float, server_default=text("50.0"), nullable=False)
+    health = Column(Float, server_default=text("100.0"), nullable=False)
+    energy = Column(Float, server_default=text("50.0"), nullable=False)
+    currency = Column(Integer, server_default=text("100"), nullable=False)
+    
     # Customization
     accessories = Column(JSON, nullable=True)  # JSON array of equipped accessories
     
+    # Keep stored enum codes in range
+    __table_args__ = (
+        enum_check("stage", PetStage, "ck_pets_stage"),
+        enum_check("current_state", PetState, "ck_pets_current_state"),
+    )
+    
     # Relationships
     creator = relationship("User", back_populates="owned_pets", foreign_keys=[created_by])
     
     ownerships = relationship(
         "PetOwnership",
         back_populates="pet",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        lazy="selectin"  # One IN(...) query per batch of pets instead of one per pet
     )
     
     metrics = relationship(
         "PetMetrics",
         back_populates="pet",
         uselist=False,  # One-to-one relationship
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan"  # Hot reads use the snapshot columns above
     )
     
     metrics_history = relationship(
         "PetMetricsHistory",
         back_populates="pet",
         cascade="all, delete-orphan",
-        order_by="PetMetricsHistory.timestamp.desc()"
+        order_by="PetMetricsHistory.timestamp.desc()",
+        passive_deletes=True,  # Rows are removed by ON DELETE CASCADE
+        lazy="raise_on_sql"  # Large collections below are never loaded implicitly
     )
     
     tasks = relationship(
         "Task",
         back_populates="pet",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        lazy="selectin"
     )
     
     inventory = relationship(
         "Inventory",
         back_populates="pet",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        lazy="selectin"
     )
     
     transactions = relationship(
         "Transaction",
         back_populates="pet",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise_on_sql"
     )
     
     messages = relationship(
         "Message",
         back_populates="pet",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise_on_sql"
     )
     
     activity_logs = relationship(
         "PetActivityLog",
         back_populates="pet",
         cascade="all, delete-orphan",
-        order_by="PetActivityLog.created_at.desc()"
+        order_by="PetActivityLog.created_at.desc()",
+        passive_deletes=True,
+        lazy="raise_on_sql"
     )
     
     def __repr__(self):
         return f"<Pet(id={self.id}, name={self.name}, stage={self.stage})>"
 
 
+# Server-side updated_at stamping
+track_updated_at(Pet.__table__)
+
+
 class PetOwnership(Base):
     """
     Pet ownership relationship (many-to-many between users and pets)
@@ -137,26 +224,59 @@ class PetOwnership(Base):
     pet_id = Column(Integer, ForeignKey("pets.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
+    # One ownership per (pet, user) and one-probe membership checks, plus the
+    # user-side index for "pets of this user"
+    __table_args__ = (
+        Index("ix_ownership_pet_user", pet_id, user_id, unique=True),
+        Index("ix_ownership_user", user_id),
+    )
+    
     # Ownership details
-    role = Column(String(20), default="co-owner", nullable=False)  # owner, co-owner
+    role = Column(String(20), server_default=text("'co-owner'"), nullable=False)  # owner, co-owner
     joined_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    is_active = Column(Boolean, default=True, nullable=False)
+    is_active = Column(Boolean, server_default=true(), nullable=False)
     
     # Permissions (for future granular control)
-    can_feed = Column(Boolean, default=True, nullable=False)
-    can_play = Column(Boolean, default=True, nullable=False)
-    can_spend_currency = Column(Boolean, default=True, nullable=False)
-    can_create_tasks = Column(Boolean, default=True, nullable=False)
-    can_invite_others = Column(Boolean, default=False, nullable=False)
+    can_feed = Column(Boolean, server_default=true(), nullable=False)
+    can_play = Column(Boolean, server_default=true(), nullable=False)
+    can_spend_currency = Column(Boolean, server_default=true(), nullable=False)
+    can_create_tasks = Column(Boolean, server_default=true(), nullable=False)
+    can_invite_others = Column(Boolean, server_default=false(), nullable=False)
     
     # Care statistics
-    total_feeds = Column(Integer, default=0, nullable=False)
-    total_plays = Column(Integer, default=0, nullable=False)
-    total_tasks_completed = Column(Integer, default=0, nullable=False)
+    total_feeds = Column(Integer, server_default=text("0"), nullable=False)
+    total_plays = Column(Integer, server_default=text("0"), nullable=False)
+    total_tasks_completed = Column(Integer, server_default=text("0"), nullable=False)
     
     # Relationships
     pet = relationship("Pet", back_populates="ownerships")
     user = relationship("User", back_populates="pet_ownerships")
+    
+    # Counter columns that may be bumped with increment()
+    COUNTER_FIELDS = frozenset({"total_feeds", "total_plays", "total_tasks_completed"})
+    
+    @classmethod
+    async def increment(
+        cls,
+        session: AsyncSession,
+        pet_id: int,
+        user_id: int,
+        field: str,
+        delta: int = 1
+    ) -> None:
+        """
+        Atomically bump a care counter with a single UPDATE ... SET x = x + delta,
+        avoiding the SELECT-then-UPDATE round-trip and lost updates
+        """
+        if field not in cls.COUNTER_FIELDS:
+            raise ValueError(f"Not a counter field: {field}")
+        
+        column = cls.__table__.c[field]
+        await session.execute(
+            update(cls)
+            .where(cls.pet_id == pet_id, cls.user_id == user_id)
+            .values({column: column + delta})
+        )
 
 
 class PetMetrics(Base):
@@ -169,20 +289,20 @@ class PetMetrics(Base):
     pet_id = Column(Integer, ForeignKey("pets.id"), unique=True, nullable=False)
     
     # Core metrics (0-100)
-    happiness = Column(Float, default=50.0, nullable=False)
-    hunger = Column(Float, default=50.0, nullable=False)  # 100 = very hungry, 0 = full
-    health = Column(Float, default=100.0, nullable=False)
-    energy = Column(Float, default=50.0, nullable=False)
+    happiness = Column(Float, server_default=text("50.0"), nullable=False)
+    hunger = Column(Float, server_default=text("50.0"), nullable=False)  # 100 = very hungry, 0 = full
+    health = Column(Float, server_default=text("100.0"), nullable=False)
+    energy = Column(Float, server_default=text("50.0"), nullable=False)
     
     # Currency
-    currency = Column(Integer, default=100, nullable=False)
-    total_currency_earned = Column(Integer, default=100, nullable=False)
-    total_currency_spent = Column(Integer, default=0, nullable=False)
+    currency = Column(Integer, server_default=text("100"), nullable=False)
+    total_currency_earned = Column(Integer, server_default=text("100"), nullable=False)
+    total_currency_spent = Column(Integer, server_default=text("0"), nullable=False)
     
     # Metric modifiers (buffs/debuffs)
-    happiness_modifier = Column(Float, default=1.0, nullable=False)
-    health_modifier = Column(Float, default=1.0, nullable=False)
-    energy_modifier = Column(Float, default=1.0, nullable=False)
+    happiness_modifier = Column(Float, server_default=text("1.0"), nullable=False)
+    health_modifier = Column(Float, server_default=text("1.0"), nullable=False)
+    energy_modifier = Column(Float, server_default=text("1.0"), nullable=False)
     
     # Timestamps
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -192,14 +312,100 @@ class PetMetrics(Base):
     pet = relationship("Pet", back_populates="metrics", uselist=False)
     
     def to_dict(self):
-        """Convert metrics to dictionary"""
+        """Convert metrics to dictionary (metrics are non-negative, so round half up)"""
         return {
-            "happiness": round(self.happiness, 1),
-            "hunger": round(self.hunger, 1),
-            "health": round(self.health, 1),
-            "energy": round(self.energy, 1),
+            "happiness": int(self.happiness * 10 + 0.5) / 10.0,
+            "hunger": int(self.hunger * 10 + 0.5) / 10.0,
+            "health": int(self.health * 10 + 0.5) / 10.0,
+            "energy": int(self.energy * 10 + 0.5) / 10.0,
             "currency": self.currency
         }
+    
+    @staticmethod
+    def bulk_to_dict(rows: List["PetMetrics"]) -> List[Dict[str, Any]]:
+        """Convert many metrics rows at once, rounding all float metrics in one NumPy pass"""
+        arr = np.fromiter(
+            (value for r in rows for value in (r.happiness, r.hunger, r.health, r.energy)),
+            dtype=np.float64,
+            count=len(rows) * 4
+        ).reshape(-1, 4)
+        # Same round-half-up as to_dict (np.round would round half to even)
+        arr = np.floor(arr * 10 + 0.5) / 10.0
+        
+        return [
+            {
+                "happiness": happiness,
+                "hunger": hunger,
+                "health": health,
+                "energy": energy,
+                "currency": r.currency
+            }
+            for r, (happiness, hunger, health, energy) in zip(rows, arr.tolist())
+        ]
+
+
+# Keep the Pet snapshot columns in sync with pet_metrics writes
+_PET_SNAPSHOT_SET = (
+    "happiness = NEW.happiness, hunger = NEW.hunger, health = NEW.health, "
+    "energy = NEW.energy, currency = NEW.currency"
+)
+
+_PET_SNAPSHOT_DDL = (
+    # PostgreSQL: one row-level trigger function for inserts and updates
+    DDL(
+        "CREATE OR REPLACE FUNCTION sync_pet_metrics_snapshot() RETURNS trigger AS $$ "
+        f"BEGIN UPDATE pets SET {_PET_SNAPSHOT_SET} WHERE id = NEW.pet_id; RETURN NEW; END; "
+        "$$ LANGUAGE plpgsql"
+    ).execute_if(dialect="postgresql"),
+    DDL(
+        "CREATE TRIGGER trg_pet_metrics_snapshot AFTER INSERT OR UPDATE ON pet_metrics "
+        "FOR EACH ROW EXECUTE FUNCTION sync_pet_metrics_snapshot()"
+    ).execute_if(dialect="postgresql"),
+    # SQLite: separate insert and update triggers
+    DDL(
+        "CREATE TRIGGER trg_pet_metrics_snapshot_insert AFTER INSERT ON pet_metrics "
+        f"BEGIN UPDATE pets SET {_PET_SNAPSHOT_SET} WHERE id = NEW.pet_id; END"
+    ).execute_if(dialect="sqlite"),
+    DDL(
+        "CREATE TRIGGER trg_pet_metrics_snapshot_update AFTER UPDATE ON pet_metrics "
+        f"BEGIN UPDATE pets SET {_PET_SNAPSHOT_SET} WHERE id = NEW.pet_id; END"
+    ).execute_if(dialect="sqlite"),
+)
+
+for _ddl in _PET_SNAPSHOT_DDL:
+    event.listen(PetMetrics.__table__, "after_create", _ddl)
+
+_PET_SNAPSHOT_COLUMNS = ("happiness", "hunger", "health", "energy", "currency")
+
+
+def upgrade_pet_snapshot(connection: Connection) -> bool:
+    """
+    Bring pets/pet_metrics tables created before the snapshot columns up to date:
+    add the columns, install the sync triggers and backfill every pet from its
+    current pet_metrics row (create_all never alters existing tables)
+    
+    Returns:
+        True if the tables needed upgrading
+    """
+    existing = {column["name"] for column in inspect(connection).get_columns("pets")}
+    missing = [name for name in _PET_SNAPSHOT_COLUMNS if name not in existing]
+    if not missing:
+        return False
+    
+    pets = Pet.__table__
+    for name in missing:
+        spec = CreateColumn(pets.c[name]).compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE pets ADD COLUMN {spec}"))
+    
+    for ddl in _PET_SNAPSHOT_DDL:
+        ddl(PetMetrics.__table__, connection)  # Honors each DDL's execute_if dialect
+    
+    connection.execute(
+        update(pets)
+        .where(pets.c.id == PetMetrics.pet_id)
+        .values({name: PetMetrics.__table__.c[name] for name in _PET_SNAPSHOT_COLUMNS})
+    )
+    return True
 
 
 class PetMetricsHistory(Base):
@@ -209,7 +415,7 @@ class PetMetricsHistory(Base):
     __tablename__ = "pet_metrics_history"
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    pet_id = Column(Integer, ForeignKey("pets.id"), nullable=False, index=True)
+    pet_id = Column(Integer, ForeignKey("pets.id", ondelete="CASCADE"), nullable=False)
     
     # Snapshot of metrics
     happiness = Column(Float, nullable=False)
@@ -223,10 +429,68 @@ class PetMetricsHistory(Base):
     event_details = Column(Text, nullable=True)
     
     # Timestamp
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    timestamp = Column(
+        DateTime(timezone=True),
+        server_default=text("CURRENT_TIMESTAMP"),
+        nullable=False,
+        primary_key=PARTITIONED  # Partition key
+    )
+    
+    # Append-only, so timestamp order follows heap order; per-pet recent history
+    # is served by the composite index, pruned to the matching partitions
+    __table_args__ = (
+        Index("ix_pmh_pet_timestamp", pet_id, timestamp.desc(), id.desc()),
+        brin_index("ix_pmh_timestamp_brin", timestamp),
+        monthly_partitions("timestamp"),
+    )
     
     # Relationships
     pet = relationship("Pet", back_populates="metrics_history")
+    
+    @classmethod
+    async def bulk_log(cls, session: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+        """Append many history snapshots in batched INSERTs"""
+        await _bulk_insert(session, cls, rows)
+    
+    @classmethod
+    async def page(
+        cls,
+        session: AsyncSession,
+        pet_id: int,
+        before: Optional[Tuple[datetime, int]] = None,
+        limit: int = 50
+    ) -> List["PetMetricsHistory"]:
+        """
+        One page of a pet's history, newest first
+        
+        Args:
+            before: (timestamp, id) of the last row of the previous page
+        """
+        stmt = _pet_log_query(cls, cls.timestamp, pet_id, before, session.bind.dialect.name).limit(limit)
+        return list((await session.scalars(stmt)).all())
+    
+    @classmethod
+    def stream(cls, session: AsyncSession, pet_id: int) -> AsyncIterator["PetMetricsHistory"]:
+        """Iterate a pet's full history without materializing it"""
+        return _stream_rows(session, _pet_log_query(cls, cls.timestamp, pet_id, None))
+    
+    @classmethod
+    async def snapshot_all(cls, session: AsyncSession, event_type: str = "decay") -> None:
+        """
+        Snapshot every pet's current metrics in a single INSERT ... SELECT,
+        for periodic jobs that log one row per pet
+        """
+        columns = ["pet_id", "happiness", "hunger", "health", "energy", "currency", "event_type"]
+        source = select(
+            PetMetrics.pet_id,
+            PetMetrics.happiness,
+            PetMetrics.hunger,
+            PetMetrics.health,
+            PetMetrics.energy,
+            PetMetrics.currency,
+            literal(event_type),
+        )
+        await session.execute(insert(cls).from_select(columns, source))
 
 
 class PetActivityLog(Base):
@@ -236,19 +500,59 @@ class PetActivityLog(Base):
     __tablename__ = "pet_activity_logs"
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    pet_id = Column(Integer, ForeignKey("pets.id"), nullable=False, index=True)
+    pet_id = Column(Integer, ForeignKey("pets.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Activity details
     activity_type = Column(String(50), nullable=False)  # fed, played, petted, task_completed, etc.
-    activity_details = Column(JSON, nullable=True)  # Additional context as JSON
+    activity_details = Column(JSONDocument, nullable=True)  # Additional context as JSON
     
     # Impact on metrics
     metrics_change = Column(JSON, nullable=True)  # JSON object with metric changes
     
     # Timestamp
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=text("CURRENT_TIMESTAMP"),
+        nullable=False,
+        primary_key=PARTITIONED  # Partition key
+    )
+    
+    # Append-only, so created_at order follows heap order; per-pet recent activity
+    # is served by the composite index, pruned to the matching partitions
+    __table_args__ = (
+        Index("ix_pal_pet_created", pet_id, created_at.desc(), id.desc()),
+        brin_index("ix_pal_created_brin", created_at),
+        monthly_partitions("created_at"),
+    )
     
     # Relationships
     pet = relationship("Pet", back_populates="activity_logs")
-    user = relationship("User", foreign_keys=[user_id])
\ No newline at end of file
+    user = relationship("User", foreign_keys=[user_id])
+    
+    @classmethod
+    async def bulk_log(cls, session: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+        """Append many activity entries in batched INSERTs"""
+        await _bulk_insert(session, cls, rows)
+    
+    @classmethod
+    async def page(
+        cls,
+        session: AsyncSession,
+        pet_id: int,
+        before: Optional[Tuple[datetime, int]] = None,
+        limit: int = 50
+    ) -> List["PetActivityLog"]:
+        """
+        One page of a pet's activity, newest first
+        
+        Args:
+            before: (created_at, id) of the last row of the previous page
+        """
+        stmt = _pet_log_query(cls, cls.created_at, pet_id, before, session.bind.dialect.name).limit(limit)
+        return list((await session.scalars(stmt)).all())
+    
+    @classmethod
+    def stream(cls, session: AsyncSession, pet_id: int) -> AsyncIterator["PetActivityLog"]:
+        """Iterate a pet's full activity log without materializing it"""
+        return _stream_rows(session, _pet_log_query(cls, cls.created_at, pet_id, None))
\ No newline at end of file
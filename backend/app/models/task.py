@@ -3,13 +3,16 @@
 Task model for real-world task management and gamification
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum, JSON, Float
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Float, Index, FetchedValue, case, false, literal, text, true, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from typing import Dict, FrozenSet
 
 from app.core.database import Base
+from app.models.types import JSONDocument, SmallIntEnum, enum_check, track_updated_at
 
 
 class TaskCategory(enum.Enum):
@@ -23,6 +26,9 @@ class TaskCategory(enum.Enum):
     SELF_CARE = "self_care"
     CUSTOM = "custom"
 
+# Allowed string values, for membership checks without constructing the Enum
+TASK_CATEGORIES: FrozenSet[str] = frozenset(member.value for member in TaskCategory)
+
 
 class TaskDifficulty(enum.Enum):
     """Task difficulty levels"""
@@ -31,6 +37,8 @@ class TaskDifficulty(enum.Enum):
     HARD = "hard"
     EXPERT = "expert"
 
+TASK_DIFFICULTIES: FrozenSet[str] = frozenset(member.value for member in TaskDifficulty)
+
 
 class TaskStatus(enum.Enum):
     """Task status"""
@@ -39,6 +47,8 @@ class TaskStatus(enum.Enum):
     CANCELLED = "cancelled"
     EXPIRED = "expired"
 
+TASK_STATUSES: FrozenSet[str] = frozenset(member.value for member in TaskStatus)
+
 
 class RecurrencePattern(enum.Enum):
     """Task recurrence patterns"""
@@ -49,12 +59,24 @@ class RecurrencePattern(enum.Enum):
     MONTHLY = "monthly"
     CUSTOM = "custom"
 
+RECURRENCE_PATTERNS: FrozenSet[str] = frozenset(member.value for member in RecurrencePattern)
+
+# How long after the previous completion a streak may continue, per recurrence
+STREAK_WINDOWS: Dict[RecurrencePattern, timedelta] = {
+    RecurrencePattern.DAILY: timedelta(days=2),
+    RecurrencePattern.WEEKLY: timedelta(weeks=2),
+    RecurrencePattern.BIWEEKLY: timedelta(weeks=4),
+    RecurrencePattern.MONTHLY: timedelta(days=62),
+}
+DEFAULT_STREAK_WINDOW = timedelta(days=2)
+
 
 class Task(Base):
     """
     Task model for real-world tasks that earn currency
     """
     __tablename__ = "tasks"
+    __mapper_args__ = {"eager_defaults": True}  # Fetch the trigger-set updated_at on UPDATE
     
     # Primary key
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
@@ -62,25 +84,25 @@ class Task(Base):
     # Task information
     title = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
-    category = Column(Enum(TaskCategory), default=TaskCategory.CUSTOM, nullable=False, index=True)
-    difficulty = Column(Enum(TaskDifficulty), default=TaskDifficulty.MEDIUM, nullable=False)
-    status = Column(Enum(TaskStatus), default=TaskStatus.ACTIVE, nullable=False, index=True)
+    category = Column(SmallIntEnum(TaskCategory), default=TaskCategory.CUSTOM, nullable=False, index=True)
+    difficulty = Column(SmallIntEnum(TaskDifficulty), default=TaskDifficulty.MEDIUM, nullable=False)
+    status = Column(SmallIntEnum(TaskStatus), default=TaskStatus.ACTIVE, nullable=False, index=True)
     
     # Associated pet and creator
-    pet_id = Column(Integer, ForeignKey("pets.id"), nullable=False, index=True)
+    pet_id = Column(Integer, ForeignKey("pets.id"), nullable=False)  # Leads ix_task_pet_status_due
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Rewards
-    currency_reward = Column(Integer, default=10, nullable=False)
-    experience_reward = Column(Integer, default=5, nullable=False)
+    currency_reward = Column(Integer, server_default=text("10"), nullable=False)
+    experience_reward = Column(Integer, server_default=text("5"), nullable=False)
     
     # Metric impacts (JSON object with metric changes)
-    metric_impacts = Column(JSON, nullable=True)  # e.g., {"happiness": 5, "health": 10}
+    metric_impacts = Column(JSONDocument, nullable=True)  # e.g., {"happiness": 5, "health": 10}
     
     # Recurrence
-    recurring = Column(Boolean, default=False, nullable=False)
-    recurrence_pattern = Column(Enum(RecurrencePattern), default=RecurrencePattern.NONE, nullable=False)
-    recurrence_details = Column(JSON, nullable=True)  # Custom recurrence rules
+    recurring = Column(Boolean, server_default=false(), nullable=False)
+    recurrence_pattern = Column(SmallIntEnum(RecurrencePattern), default=RecurrencePattern.NONE, nullable=False)
+    recurrence_details = Column(JSONDocument, nullable=True)  # Custom recurrence rules
     parent_task_id = Column(Integer, ForeignKey("tasks.id"), nullable=True)  # For recurring task instances
     
     # Timing
@@ -89,25 +111,38 @@ class Task(Base):
     estimated_duration = Column(Integer, nullable=True)  # In minutes
     
     # Verification
-    requires_proof = Column(Boolean, default=False, nullable=False)
+    requires_proof = Column(Boolean, server_default=false(), nullable=False)
     proof_type = Column(String(50), nullable=True)  # photo, timer, location, etc.
     
     # Streak tracking
-    streak_count = Column(Integer, default=0, nullable=False)
-    max_streak = Column(Integer, default=0, nullable=False)
+    streak_count = Column(Integer, server_default=text("0"), nullable=False)
+    max_streak = Column(Integer, server_default=text("0"), nullable=False)
     last_completed_at = Column(DateTime(timezone=True), nullable=True)
     
     # Priority and tags
-    priority = Column(Integer, default=0, nullable=False)  # Higher number = higher priority
-    tags = Column(JSON, nullable=True)  # Array of tags
+    priority = Column(Integer, server_default=text("0"), nullable=False)  # Higher number = higher priority
+    tags = Column(JSONDocument, nullable=True)  # Array of tags
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_onupdate=FetchedValue(), nullable=True)  # Set by trigger
     
     # Completion statistics
-    total_completions = Column(Integer, default=0, nullable=False)
-    completion_rate = Column(Float, default=0.0, nullable=False)  # Percentage
+    total_completions = Column(Integer, server_default=text("0"), nullable=False)
+    completion_rate = Column(Float, server_default=text("0.0"), nullable=False)  # Percentage
+    
+    # "A pet's active tasks by due date" and "tasks I created by status"
+    __table_args__ = (
+        Index("ix_task_pet_status_due", "pet_id", "status", "due_date"),
+        Index("ix_task_creator_status", "created_by", "status"),
+        # Containment filters such as tags @> '["outdoor"]' (PostgreSQL)
+        Index("ix_task_tags_gin", tags, postgresql_using="gin").ddl_if(dialect="postgresql"),
+        # Keep stored enum codes in range
+        enum_check("category", TaskCategory, "ck_tasks_category"),
+        enum_check("difficulty", TaskDifficulty, "ck_tasks_difficulty"),
+        enum_check("status", TaskStatus, "ck_tasks_status"),
+        enum_check("recurrence_pattern", RecurrencePattern, "ck_tasks_recurrence_pattern"),
+    )
     
     # Relationships
     pet = relationship("Pet", back_populates="tasks")
@@ -116,21 +151,24 @@ class Task(Base):
     assignments = relationship(
         "TaskAssignment",
         back_populates="task",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        lazy="selectin"  # One IN(...) query per batch of tasks
     )
     
     completions = relationship(
         "TaskCompletion",
         back_populates="task",
         cascade="all, delete-orphan",
-        order_by="TaskCompletion.completed_at.desc()"
+        order_by="TaskCompletion.completed_at.desc()"  # Unbounded history; load with selectinload() where needed
     )
     
+    # Recurring instances of this task (one-to-many); read-only, one-way and never
+    # loaded implicitly, writes go through parent_task_id
     child_tasks = relationship(
         "Task",
-        backref="parent_task",
         foreign_keys=[parent_task_id],
-        remote_side=[id]
+        viewonly=True,
+        lazy="raise"
     )
     
     comments = relationship(
@@ -140,6 +178,35 @@ class Task(Base):
         order_by="TaskComment.created_at.desc()"
     )
     
+    @classmethod
+    async def record_completion(cls, session: AsyncSession, task_id: int) -> int:
+        """
+        Bump the completion counters and streak in a single UPDATE, computed
+        from the row's current values instead of a read-modify-write
+        
+        Returns:
+            The task's streak after this completion
+        """
+        now = datetime.now(timezone.utc)
+        cutoff = case(
+            *[(cls.recurrence_pattern == pattern, literal(now - window)) for pattern, window in STREAK_WINDOWS.items()],
+            else_=literal(now - DEFAULT_STREAK_WINDOW)
+        )
+        streak = case((cls.last_completed_at >= cutoff, cls.streak_count + 1), else_=1)
+        
+        result = await session.execute(
+            update(cls)
+            .where(cls.id == task_id)
+            .values(
+                total_completions=cls.total_completions + 1,
+                streak_count=streak,
+                max_streak=case((streak > cls.max_streak, streak), else_=cls.max_streak),
+                last_completed_at=now
+            )
+            .returning(cls.streak_count)
+        )
+        return result.scalar_one()
+    
     def __repr__(self):
         return f"<Task(id={self.id}, title={self.title}, category={self.category})>"
 
@@ -159,14 +226,14 @@ class TaskAssignment(Base):
     
     # Assignment details
     assigned_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    accepted = Column(Boolean, default=False, nullable=False)
+    accepted = Column(Boolean, server_default=false(), nullable=False)
     accepted_at = Column(DateTime(timezone=True), nullable=True)
     
     # Status
-    is_active = Column(Boolean, default=True, nullable=False)
+    is_active = Column(Boolean, server_default=true(), nullable=False)
     
     # Relationships
-    task = relationship("Task", back_populates="assignments")
+    task = relationship("Task", back_populates="assignments", lazy="joined")
     user = relationship("User", back_populates="task_assignments", foreign_keys=[user_id])
     assigner = relationship("User", foreign_keys=[assigned_by])
 
@@ -180,8 +247,8 @@ class TaskCompletion(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     
     # Foreign keys
-    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Completion details
     completed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
@@ -190,14 +257,14 @@ class TaskCompletion(Base):
     # Proof/verification
     proof_url = Column(String(500), nullable=True)  # URL to uploaded proof (photo, etc.)
     proof_type = Column(String(50), nullable=True)
-    verified = Column(Boolean, default=False, nullable=False)
+    verified = Column(Boolean, server_default=false(), nullable=False)
     verified_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     verified_at = Column(DateTime(timezone=True), nullable=True)
     
     # Rewards given
     currency_earned = Column(Integer, nullable=False)
     experience_earned = Column(Integer, nullable=False)
-    metrics_applied = Column(JSON, nullable=True)  # Actual metric changes applied
+    metrics_applied = Column(JSONDocument, nullable=True)  # Actual metric changes applied
     
     # Notes
     notes = Column(Text, nullable=True)
@@ -205,8 +272,14 @@ class TaskCompletion(Base):
     # Quality/rating (for future gamification)
     quality_score = Column(Integer, nullable=True)  # 1-5 rating
     
+    # Completion history per user or per task over a date range
+    __table_args__ = (
+        Index("ix_completion_user_time", "user_id", "completed_at"),
+        Index("ix_completion_task_time", "task_id", "completed_at"),
+    )
+    
     # Relationships
-    task = relationship("Task", back_populates="completions")
+    task = relationship("Task", back_populates="completions", lazy="joined")
     user = relationship("User", back_populates="task_completions", foreign_keys=[user_id])
     verifier = relationship("User", foreign_keys=[verified_by])
 
@@ -216,6 +289,7 @@ class TaskComment(Base):
     Comments on tasks for collaboration
     """
     __tablename__ = "task_comments"
+    __mapper_args__ = {"eager_defaults": True}  # Fetch the trigger-set updated_at on UPDATE
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     
@@ -228,23 +302,34 @@ class TaskComment(Base):
     content = Column(Text, nullable=False)
     
     # Mentions
-    mentioned_users = Column(JSON, nullable=True)  # Array of user_ids mentioned
+    mentioned_users = Column(JSONDocument, nullable=True)  # Array of user_ids mentioned
     
     # Status
-    is_edited = Column(Boolean, default=False, nullable=False)
-    is_deleted = Column(Boolean, default=False, nullable=False)
+    is_edited = Column(Boolean, server_default=false(), nullable=False)
+    is_deleted = Column(Boolean, server_default=false(), nullable=False)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_onupdate=FetchedValue(), nullable=True)  # Set by trigger
+    
+    __table_args__ = (
+        Index("ix_comment_mentions_gin", mentioned_users, postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
     
     # Relationships
     task = relationship("Task", back_populates="comments")
-    user = relationship("User", foreign_keys=[user_id])
+    user = relationship("User", foreign_keys=[user_id], lazy="joined")
     
+    # Direct replies to this comment (one-to-many); read-only and one-way,
+    # writes go through parent_comment_id
     replies = relationship(
         "TaskComment",
-        backref="parent_comment",
         foreign_keys=[parent_comment_id],
-        remote_side=[id]
-    )
\ No newline at end of file
+        viewonly=True,
+        lazy="raise"
+    )
+
+
+# Server-side updated_at stamping
+track_updated_at(Task.__table__)
+track_updated_at(TaskComment.__table__)
\ No newline at end of file
@@ -0,0 +1,101 @@
+# backend/app/models/types.py
+"""
+Custom column types and table helpers shared by the models
+"""
+
+from sqlalchemy import DDL, JSON, CheckConstraint, Index, SmallInteger, Table, event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator
+from typing import Any, Dict, Type
+import enum
+
+from app.core.database import DATABASE_URL
+
+
+# Append-only log tables are range-partitioned by month on PostgreSQL; the
+# partition key must then be part of the primary key
+PARTITIONED = DATABASE_URL.startswith("postgresql")
+
+# JSON column that is binary JSONB (GIN-indexable, no re-parse on read) on PostgreSQL
+JSONDocument = JSON().with_variant(postgresql.JSONB(), "postgresql")
+
+
+class SmallIntEnum(TypeDecorator):
+    """
+    Store a Python Enum as a 2-byte SMALLINT code instead of a database ENUM type
+    
+    Codes are the member's position in the Enum definition, so new members must
+    be appended at the end. The Python members (and their string values) are
+    unchanged for application code.
+    """
+    impl = SmallInteger
+    cache_ok = True
+    
+    def __init__(self, enum_class: Type[enum.Enum]):
+        super().__init__()
+        self.enum_class = enum_class
+        self._members = tuple(enum_class)
+        self._codes = {member: code for code, member in enumerate(self._members)}
+        # Raw string values bind through a dict lookup instead of Enum.__call__
+        self._value_codes = {member.value: code for code, member in enumerate(self._members)}
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, self.enum_class):
+            return self._codes[value]
+        try:
+            return self._value_codes[value]
+        except (KeyError, TypeError):
+            raise ValueError(f"{value!r} is not a valid {self.enum_class.__name__}") from None
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self._members[value]
+
+
+def brin_index(name: str, column) -> Index:
+    """
+    BRIN index for a monotonically increasing timestamp on an append-only table
+    (PostgreSQL only; a small fraction of a B-tree's size and write cost)
+    """
+    return Index(
+        name,
+        column,
+        postgresql_using="brin",
+        postgresql_with={"pages_per_range": 32}
+    ).ddl_if(dialect="postgresql")
+
+
+def monthly_partitions(column: str) -> Dict[str, Any]:
+    """Table options for RANGE partitioning on a timestamp column (PostgreSQL only)"""
+    if not PARTITIONED:
+        return {}
+    return {"postgresql_partition_by": f"RANGE ({column})"}
+
+
+def track_updated_at(table: Table) -> None:
+    """
+    Install a trigger that stamps updated_at on every row UPDATE, including
+    bulk UPDATEs that bypass the ORM (PostgreSQL and SQLite)
+    """
+    event.listen(table, "after_create", DDL(
+        "CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$ "
+        "BEGIN NEW.updated_at = now(); RETURN NEW; END; $$ LANGUAGE plpgsql"
+    ).execute_if(dialect="postgresql"))
+    event.listen(table, "after_create", DDL(
+        f"CREATE TRIGGER trg_{table.name}_updated BEFORE UPDATE ON {table.name} "
+        "FOR EACH ROW EXECUTE FUNCTION set_updated_at()"
+    ).execute_if(dialect="postgresql"))
+    # SQLite can't assign NEW in a trigger; re-stamp the row after the update
+    # (recursive triggers are off by default, so this doesn't re-fire)
+    event.listen(table, "after_create", DDL(
+        f"CREATE TRIGGER trg_{table.name}_updated AFTER UPDATE ON {table.name} "
+        f"BEGIN UPDATE {table.name} SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id; END"
+    ).execute_if(dialect="sqlite"))
+
+
+def enum_check(column: str, enum_class: Type[enum.Enum], name: str) -> CheckConstraint:
+    """CHECK constraint limiting a SmallIntEnum column to valid codes"""
+    return CheckConstraint(f"{column} BETWEEN 0 AND {len(enum_class) - 1}", name=name)
@@ -3,12 +3,14 @@
 User model for authentication and profile management
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Index, FetchedValue, false, text, true
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 
 from app.core.database import Base
+from app.models.types import track_updated_at
+from app.schemas.user import UserOut
 
 
 class User(Base):
@@ -16,6 +18,7 @@ class User(Base):
     User model representing app users
     """
     __tablename__ = "users"
+    __mapper_args__ = {"eager_defaults": True}  # Fetch the trigger-set updated_at on UPDATE
     
     # Primary key
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
@@ -31,13 +34,13 @@ class User(Base):
     bio = Column(Text, nullable=True)
     
     # Account status
-    is_active = Column(Boolean, default=True, nullable=False)
-    is_verified = Column(Boolean, default=False, nullable=False)
-    is_admin = Column(Boolean, default=False, nullable=False)
+    is_active = Column(Boolean, server_default=true(), nullable=False)
+    is_verified = Column(Boolean, server_default=false(), nullable=False)
+    is_admin = Column(Boolean, server_default=false(), nullable=False)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_onupdate=FetchedValue(), nullable=True)  # Set by trigger
     last_login = Column(DateTime(timezone=True), nullable=True)
     
     # Email verification
@@ -49,13 +52,38 @@ class User(Base):
     password_reset_expires = Column(DateTime(timezone=True), nullable=True)
     
     # API keys (for future use)
-    api_key = Column(String(255), nullable=True, unique=True)
+    api_key = Column(String(255), nullable=True)
     api_key_created_at = Column(DateTime(timezone=True), nullable=True)
     
     # Notification preferences
     notification_preferences = Column(Text, nullable=True)  # JSON field for preferences
     push_token = Column(String(255), nullable=True)  # For mobile push notifications
     
+    # Token columns are NULL for nearly every user; index only the live ones
+    __table_args__ = (
+        Index(
+            "ix_user_email_verif_token",
+            email_verification_token,
+            unique=True,
+            postgresql_where=text("email_verification_token IS NOT NULL"),
+            sqlite_where=text("email_verification_token IS NOT NULL")
+        ),
+        Index(
+            "ix_user_pw_reset_token",
+            password_reset_token,
+            unique=True,
+            postgresql_where=text("password_reset_token IS NOT NULL"),
+            sqlite_where=text("password_reset_token IS NOT NULL")
+        ),
+        Index(
+            "ix_user_api_key",
+            api_key,
+            unique=True,
+            postgresql_where=text("api_key IS NOT NULL"),
+            sqlite_where=text("api_key IS NOT NULL")
+        ),
+    )
+    
     # Relationships
     owned_pets = relationship(
         "Pet",
@@ -80,12 +108,14 @@ class User(Base):
     task_assignments = relationship(
         "TaskAssignment",
         back_populates="user",
+        foreign_keys="TaskAssignment.user_id",
         cascade="all, delete-orphan"
     )
     
     task_completions = relationship(
         "TaskCompletion",
         back_populates="user",
+        foreign_keys="TaskCompletion.user_id",
         cascade="all, delete-orphan"
     )
     
@@ -118,15 +148,8 @@ class User(Base):
     
     def to_dict(self):
         """Convert user to dictionary for API responses"""
-        return {
-            "id": self.id,
-            "username": self.username,
-            "email": self.email,
-            "display_name": self.display_name,
-            "avatar_url": self.avatar_url,
-            "bio": self.bio,
-            "is_active": self.is_active,
-            "is_verified": self.is_verified,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "last_login": self.last_login.isoformat() if self.last_login else None
-        }
\ No newline at end of file
+        return UserOut.model_validate(self).model_dump(mode="json")
+
+
+# Server-side updated_at stamping
+track_updated_at(User.__table__)
\ No newline at end of file
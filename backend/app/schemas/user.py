@@ -0,0 +1,30 @@
+# backend/app/schemas/user.py
+"""
+User serialization schemas
+"""
+
+from pydantic import BaseModel, ConfigDict, field_serializer
+from typing import Optional
+from datetime import datetime
+
+
+class UserOut(BaseModel):
+    """Public user fields, read straight from a User row"""
+    # Optional where the value is only known after a flush (server defaults, PK)
+    id: Optional[int] = None
+    username: str
+    email: str
+    display_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+    bio: Optional[str] = None
+    is_active: Optional[bool] = None
+    is_verified: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    last_login: Optional[datetime] = None
+    
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+    
+    @field_serializer("created_at", "last_login")
+    def _isoformat(self, value: Optional[datetime]) -> Optional[str]:
+        """Same format as datetime.isoformat() (+00:00, not Z)"""
+        return value.isoformat() if value is not None else None
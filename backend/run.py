@@ -15,20 +15,32 @@ if __name__ == "__main__":
     # Import settings to check configuration
     try:
         from app.core.config import settings
-        print(f"🐱 Starting {settings.APP_NAME} v{settings.APP_VERSION}")
-        print(f"📍 Environment: {settings.ENVIRONMENT}")
-        print(f"🔧 Debug mode: {settings.DEBUG}")
-        print(f"📊 Database: {settings.DATABASE_URL}")
-        print("-" * 50)
+        banner = [
+            f"🐱 Starting {settings.APP_NAME} v{settings.APP_VERSION}",
+            f"📍 Environment: {settings.ENVIRONMENT}",
+            f"🔧 Debug mode: {settings.DEBUG}",
+            f"📊 Database: {settings.DATABASE_URL}",
+            "-" * 50,
+        ]
+        sys.stdout.write("\n".join(banner) + "\n")  # One write instead of one per line
     except Exception as e:
         print(f"❌ Configuration error: {e}")
         sys.exit(1)
     
-    # Run the server
+    # Run the server; in development only app/ is watched for reloads
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    development = settings.ENVIRONMENT == "development"
+    reload_options = dict(
+        reload=True,
+        reload_dirs=[os.path.join(base_dir, "app")],
+        reload_includes=["*.py"],
+        reload_excludes=["*.pyc", "__pycache__/*", "*.db"]
+    ) if development else {}
+    
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
-        log_level="info"
+        log_level="info",
+        **reload_options
     )
\ No newline at end of file
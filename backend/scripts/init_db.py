@@ -13,15 +13,17 @@ from contextlib import asynccontextmanager
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from sqlalchemy import create_engine, text
-from app.core.database import Base, engine, SessionLocal, init_db
+from sqlalchemy import create_engine, insert, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import AsyncSessionLocal, Base, async_engine, create_monthly_partitions, engine, init_db
 from app.core.config import settings
 from app.core.security import get_password_hash
+from app.db.seed_data import INITIAL_ACHIEVEMENTS, INITIAL_ITEMS
 import logging
 
 # Import all models
 from app.models.user import User
-from app.models.pet import Pet, PetOwnership, PetMetrics, PetMetricsHistory, PetActivityLog
+from app.models.pet import Pet, PetOwnership, PetMetrics, PetMetricsHistory, PetActivityLog, upgrade_pet_snapshot
 from app.models.task import Task, TaskAssignment, TaskCompletion, TaskComment
 from app.models import (
     Item, Inventory, Transaction, Message, Notification,
@@ -31,15 +33,38 @@ from app.models import (
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Schema changes that create_tables() cannot apply to a database created before
+# them. There are no data migrations for these; such a database has to be rebuilt
+# with --fresh (its rows are not carried over):
+#   - enum columns on items, transactions, notifications, achievements, invitations
+#     and pets are SMALLINT codes with CHECK constraints, not strings
+#   - PostgreSQL: pet_metrics_history, pet_activity_logs and transactions are
+#     range-partitioned by month, with (id, timestamp/created_at) primary keys
+#   - task enums (category, difficulty, status, recurrence) are SMALLINT codes too
+#   - updated_at is stamped by BEFORE UPDATE triggers installed on table create;
+#     older tables have no trigger and stop getting updated_at
+#   - notification and message text lives in notification_bodies/message_bodies;
+#     existing content columns are not copied over
+
 
 def create_tables():
     """Create all database tables"""
     logger.info("Creating database tables...")
     try:
-        Base.metadata.create_all(bind=engine)
-        logger.info("✅ Database tables created successfully!")
+        # One catalog listing instead of a has-table probe per model
+        existing = set(inspect(engine).get_table_names())
+        missing = [table for name, table in Base.metadata.tables.items() if name not in existing]
+        Base.metadata.create_all(bind=engine, tables=missing, checkfirst=False)
+        create_monthly_partitions()  # Partitioned log tables reject inserts until these exist
+        logger.info("✅ Database tables created successfully! (%d new)", len(missing))
+        
+        # Existing pets tables predate the denormalized metrics snapshot
+        if {"pets", "pet_metrics"} <= existing:
+            with engine.begin() as conn:
+                if upgrade_pet_snapshot(conn):
+                    logger.info("✅ Added and backfilled pet metrics snapshot columns")
     except Exception as e:
-        logger.error(f"❌ Error creating tables: {e}")
+        logger.error("❌ Error creating tables: %s", e)
         raise
 
 
@@ -50,262 +75,77 @@ def drop_tables():
         Base.metadata.drop_all(bind=engine)
         logger.info("✅ All tables dropped successfully!")
     except Exception as e:
-        logger.error(f"❌ Error dropping tables: {e}")
+        logger.error("❌ Error dropping tables: %s", e)
         raise
 
 
-def create_initial_items():
+async def create_initial_items(db: AsyncSession):
     """Create initial items in the database"""
-    db = SessionLocal()
-    try:
-        # Check if items already exist
-        existing_items = db.query(Item).first()
-        if existing_items:
-            logger.info("Items already exist, skipping...")
-            return
-        
-        initial_items = [
-            {
-                "name": "Catnip",
-                "description": "A classic treat that makes your cat happy",
-                "item_type": "food",
-                "cost": 10,
-                "effects": {"happiness": 20, "hunger": -30, "energy": 10},
-                "icon_url": "/items/catnip.png"
-            },
-            {
-                "name": "Tuna Treat",
-                "description": "Delicious tuna that satisfies hunger",
-                "item_type": "food",
-                "cost": 15,
-                "effects": {"happiness": 15, "hunger": -40, "health": 5},
-                "icon_url": "/items/tuna.png"
-            },
-            {
-                "name": "Milk Bowl",
-                "description": "Fresh milk for your thirsty cat",
-                "item_type": "food",
-                "cost": 5,
-                "effects": {"happiness": 10, "hunger": -20, "energy": 5},
-                "icon_url": "/items/milk.png"
-            },
-            {
-                "name": "Yarn Ball",
-                "description": "A fun toy to play with",
-                "item_type": "toy",
-                "cost": 20,
-                "effects": {"happiness": 25, "energy": -15},
-                "icon_url": "/items/yarn.png",
-                "is_consumable": False
-            },
-            {
-                "name": "Feather Wand",
-                "description": "Interactive toy for playtime",
-                "item_type": "toy",
-                "cost": 25,
-                "effects": {"happiness": 30, "energy": -20},
-                "icon_url": "/items/feather.png",
-                "is_consumable": False
-            },
-            {
-                "name": "Health Potion",
-                "description": "Restores your cat's health",
-                "item_type": "medicine",
-                "cost": 30,
-                "effects": {"health": 50},
-                "icon_url": "/items/health_potion.png"
-            },
-            {
-                "name": "Energy Drink",
-                "description": "Boosts your cat's energy",
-                "item_type": "medicine",
-                "cost": 25,
-                "effects": {"energy": 40},
-                "icon_url": "/items/energy_drink.png"
-            },
-            {
-                "name": "Bow Tie",
-                "description": "A stylish accessory for your cat",
-                "item_type": "accessory",
-                "cost": 50,
-                "effects": {"happiness": 5},
-                "icon_url": "/items/bowtie.png",
-                "is_consumable": False
-            }
-        ]
-        
-        for item_data in initial_items:
-            item = Item(**item_data)
-            db.add(item)
-        
-        db.commit()
-        logger.info(f"✅ Created {len(initial_items)} initial items")
-        
-    except Exception as e:
-        logger.error(f"❌ Error creating initial items: {e}")
-        db.rollback()
-    finally:
-        db.close()
+    # Check if items already exist
+    if await db.scalar(select(select(Item.id).exists())):
+        logger.info("Items already exist, skipping...")
+        return
+    
+    # ORM bulk INSERT, batched by key set; no ORM instances or unit-of-work flush
+    await db.execute(insert(Item), list(INITIAL_ITEMS))
+    logger.info("✅ Created %d initial items", len(INITIAL_ITEMS))
 
 
-def create_initial_achievements():
+async def create_initial_achievements(db: AsyncSession):
     """Create initial achievements"""
-    db = SessionLocal()
-    try:
-        # Check if achievements already exist
-        existing = db.query(Achievement).first()
-        if existing:
-            logger.info("Achievements already exist, skipping...")
-            return
-        
-        achievements = [
-            # Care achievements
-            {
-                "name": "First Feed",
-                "description": "Feed your pet for the first time",
-                "category": "care",
-                "requirements": {"feeds": 1},
-                "currency_reward": 10,
-                "experience_reward": 5,
-                "rarity": "common"
-            },
-            {
-                "name": "Caring Owner",
-                "description": "Feed your pet 100 times",
-                "category": "care",
-                "requirements": {"feeds": 100},
-                "currency_reward": 100,
-                "experience_reward": 50,
-                "rarity": "rare"
-            },
-            {
-                "name": "Pet Whisperer",
-                "description": "Pet your cat 50 times",
-                "category": "care",
-                "requirements": {"pets": 50},
-                "currency_reward": 50,
-                "experience_reward": 25,
-                "rarity": "common"
-            },
-            
-            # Task achievements
-            {
-                "name": "Task Master",
-                "description": "Complete 10 tasks",
-                "category": "tasks",
-                "requirements": {"tasks_completed": 10},
-                "currency_reward": 50,
-                "experience_reward": 25,
-                "rarity": "common"
-            },
-            {
-                "name": "Productivity Pro",
-                "description": "Complete 100 tasks",
-                "category": "tasks",
-                "requirements": {"tasks_completed": 100},
-                "currency_reward": 200,
-                "experience_reward": 100,
-                "rarity": "epic"
-            },
-            {
-                "name": "Streak Champion",
-                "description": "Maintain a 7-day task streak",
-                "category": "tasks",
-                "requirements": {"streak_days": 7},
-                "currency_reward": 100,
-                "experience_reward": 50,
-                "rarity": "rare"
-            },
-            
-            # Social achievements
-            {
-                "name": "Team Player",
-                "description": "Share your pet with another user",
-                "category": "social",
-                "requirements": {"co_owners": 1},
-                "currency_reward": 30,
-                "experience_reward": 15,
-                "rarity": "common"
-            },
-            {
-                "name": "Social Butterfly",
-                "description": "Share pets with 5 different users",
-                "category": "social",
-                "requirements": {"unique_co_owners": 5},
-                "currency_reward": 150,
-                "experience_reward": 75,
-                "rarity": "epic"
-            },
-            
-            # Milestones
-            {
-                "name": "Week One",
-                "description": "Keep your pet alive for 7 days",
-                "category": "milestones",
-                "requirements": {"days_alive": 7},
-                "currency_reward": 100,
-                "experience_reward": 50,
-                "rarity": "common"
-            },
-            {
-                "name": "Monthly Milestone",
-                "description": "Keep your pet alive for 30 days",
-                "category": "milestones",
-                "requirements": {"days_alive": 30},
-                "currency_reward": 500,
-                "experience_reward": 250,
-                "rarity": "legendary"
-            }
-        ]
-        
-        for ach_data in achievements:
-            achievement = Achievement(**ach_data)
-            db.add(achievement)
-        
-        db.commit()
-        logger.info(f"✅ Created {len(achievements)} initial achievements")
-        
-    except Exception as e:
-        logger.error(f"❌ Error creating achievements: {e}")
-        db.rollback()
-    finally:
-        db.close()
+    # Check if achievements already exist
+    if await db.scalar(select(select(Achievement.id).exists())):
+        logger.info("Achievements already exist, skipping...")
+        return
+    
+    await db.execute(insert(Achievement), list(INITIAL_ACHIEVEMENTS))
+    logger.info("✅ Created %d initial achievements", len(INITIAL_ACHIEVEMENTS))
 
 
-def create_test_user():
+async def create_test_user(db: AsyncSession):
     """Create a test user for development"""
-    db = SessionLocal()
+    # Check if test user exists
+    if await db.scalar(select(select(User.id).filter_by(email="test@purretys.com").exists())):
+        logger.info("Test user already exists, skipping...")
+        return
+    
+    test_user = User(
+        email="test@purretys.com",
+        username="testuser",
+        hashed_password=get_password_hash("testpass123"),
+        display_name="Test User",
+        is_active=True,
+        is_verified=True
+    )
+    
+    db.add(test_user)
+    
+    logger.info("✅ Created test user: %s", test_user.email)
+    logger.info("   Username: testuser")
+    logger.info("   Password: testpass123")
+    
+    return test_user
+
+
+async def seed_initial_data() -> bool:
+    """
+    Run the seed steps one after another in one session and one transaction;
+    any failure rolls it all back
+    
+    Returns:
+        True if seeding succeeded
+    """
     try:
-        # Check if test user exists
-        existing = db.query(User).filter_by(email="test@purretys.com").first()
-        if existing:
-            logger.info("Test user already exists, skipping...")
-            return
-        
-        test_user = User(
-            email="test@purretys.com",
-            username="testuser",
-            hashed_password=get_password_hash("testpass123"),
-            display_name="Test User",
-            is_active=True,
-            is_verified=True
-        )
-        
-        db.add(test_user)
-        db.commit()
-        db.refresh(test_user)
-        
-        logger.info(f"✅ Created test user: {test_user.email}")
-        logger.info("   Username: testuser")
-        logger.info("   Password: testpass123")
-        
-        return test_user
-        
+        async with AsyncSessionLocal.begin() as db:
+            await create_initial_items(db)
+            await create_initial_achievements(db)
+            await create_test_user(db)
     except Exception as e:
-        logger.error(f"❌ Error creating test user: {e}")
-        db.rollback()
+        logger.error("❌ Error creating initial data: %s", e)
+        return False
     finally:
-        db.close()
+        await async_engine.dispose()
+    return True
 
 
 def check_database_health():
@@ -316,40 +156,36 @@ def check_database_health():
             result = conn.execute(text("SELECT 1"))
             logger.info("✅ Database connection successful")
         
-        # Check tables
-        inspector = engine.inspect(engine)
-        tables = inspector.get_table_names()
-        
-        expected_tables = [
-            'users', 'pets', 'pet_ownerships', 'pet_metrics', 
-            'pet_metrics_history', 'pet_activity_logs',
-            'tasks', 'task_assignments', 'task_completions', 'task_comments',
-            'items', 'inventory', 'transactions',
-            'messages', 'notifications',
-            'achievements', 'user_achievements', 'pet_invitations'
-        ]
+        # Check tables: one catalog listing compared against the loaded models
+        tables = set(inspect(engine).get_table_names())
+        expected_tables = Base.metadata.tables.keys()
         
-        missing_tables = [t for t in expected_tables if t not in tables]
+        missing_tables = sorted(expected_tables - tables)
         
         if missing_tables:
-            logger.warning(f"⚠️  Missing tables: {missing_tables}")
+            logger.warning("⚠️  Missing tables: %s", missing_tables)
             return False
         else:
-            logger.info(f"✅ All {len(expected_tables)} tables exist")
+            logger.info("✅ All %d tables exist", len(expected_tables))
             return True
             
     except Exception as e:
-        logger.error(f"❌ Database health check failed: {e}")
+        logger.error("❌ Database health check failed: %s", e)
         return False
 
 
 def main():
     """Main initialization function"""
-    print("\n" + "="*50)
-    print("🐱 PURRETYS DATABASE INITIALIZATION")
-    print("="*50 + "\n")
-    
-    print(f"Database: {settings.DATABASE_URL}\n")
+    sys.stdout.write("\n".join([
+        "",
+        "="*50,
+        "🐱 PURRETYS DATABASE INITIALIZATION",
+        "="*50,
+        "",
+        f"Database: {settings.DATABASE_URL}",
+        "",
+        "",
+    ]))
     
     # Check if we should drop existing tables
     if len(sys.argv) > 1 and sys.argv[1] == "--fresh":
@@ -357,7 +193,7 @@ def main():
         if response.lower() == "yes":
             drop_tables()
         else:
-            print("Cancelled.")
+            sys.stdout.write("Cancelled.\n")
             return
     
     # Create tables
@@ -369,21 +205,26 @@ def main():
         return
     
     # Create initial data
-    print("\n📦 Creating initial data...")
-    create_initial_items()
-    create_initial_achievements()
-    create_test_user()
+    sys.stdout.write("\n📦 Creating initial data...\n")
+    if not asyncio.run(seed_initial_data()):
+        return
     
-    print("\n" + "="*50)
-    print("✅ DATABASE INITIALIZATION COMPLETE!")
-    print("="*50)
-    print("\nYou can now run the application with:")
-    print("  cd backend && python run.py")
-    print("\nOr use Alembic for migrations:")
-    print("  cd backend")
-    print("  alembic init alembic  # First time only")
-    print("  alembic revision --autogenerate -m 'Initial migration'")
-    print("  alembic upgrade head")
+    sys.stdout.write("\n".join([
+        "",
+        "="*50,
+        "✅ DATABASE INITIALIZATION COMPLETE!",
+        "="*50,
+        "",
+        "You can now run the application with:",
+        "  cd backend && python run.py",
+        "",
+        "Or use Alembic for migrations:",
+        "  cd backend",
+        "  alembic init alembic  # First time only",
+        "  alembic revision --autogenerate -m 'Initial migration'",
+        "  alembic upgrade head",
+        "",
+    ]))
 
 
 if __name__ == "__main__":
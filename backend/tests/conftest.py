@@ -0,0 +1,35 @@
+# backend/tests/conftest.py
+"""
+Shared fixtures: an in-memory SQLite database with the full schema
+"""
+
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401  (registers every model on Base.metadata)
+from app.core.database import Base
+from app.models.user import User
+from app.models.pet import Pet
+
+@pytest_asyncio.fixture
+async def session():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+@pytest_asyncio.fixture
+async def user(session):
+    user = User(email="owner@example.com", username="owner", hashed_password="x")
+    session.add(user)
+    await session.commit()
+    return user
+
+@pytest_asyncio.fixture
+async def pet(session, user):
+    pet = Pet(name="Whiskers", created_by=user.id)
+    session.add(pet)
+    await session.commit()
+    return pet
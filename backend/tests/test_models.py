@@ -0,0 +1,182 @@
+# backend/tests/test_models.py
+"""
+Tests for model helpers in app.models
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, text, update
+from sqlalchemy.exc import StatementError
+from sqlalchemy.orm import selectinload
+
+from app.models import Item, ItemType, Notification, NotificationType
+from app.models.pet import PetActivityLog, PetMetrics, PetMetricsHistory, PetOwnership, upgrade_pet_snapshot
+from app.models.task import (
+    RECURRENCE_PATTERNS, TASK_CATEGORIES, RecurrencePattern, Task, TaskCategory, TaskDifficulty
+)
+from app.models.user import User
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    Item.registry_clear()
+    yield
+    Item.registry_clear()
+
+async def test_registry_survives_rollback(session):
+    session.add(Item(name="Catnip", item_type=ItemType.FOOD, cost=5, effects={"hunger": -30}))
+    await session.commit()
+    
+    registry = await Item.registry(session)
+    await session.rollback()
+    
+    item = registry.by_name["Catnip"]
+    assert item.name == "Catnip"
+    assert item.item_type is ItemType.FOOD
+    assert registry.by_id[item.id] is item
+    assert (await Item.registry(session)) is registry
+
+async def test_history_pages_do_not_overlap(session, pet):
+    await PetMetricsHistory.bulk_log(session, [
+        {"pet_id": pet.id, "happiness": 50, "hunger": 50, "health": 50, "energy": 50, "currency": 0}
+        for _ in range(4)
+    ])
+    await session.commit()
+    
+    first = await PetMetricsHistory.page(session, pet.id, limit=2)
+    second = await PetMetricsHistory.page(
+        session, pet.id, before=(first[-1].timestamp, first[-1].id), limit=2
+    )
+    assert [row.id for row in first] == [4, 3]
+    assert [row.id for row in second] == [2, 1]
+
+async def test_activity_pages_do_not_overlap(session, user, pet):
+    await PetActivityLog.bulk_log(session, [
+        {"pet_id": pet.id, "user_id": user.id, "activity_type": "fed"} for _ in range(3)
+    ])
+    await session.commit()
+    
+    first = await PetActivityLog.page(session, pet.id, limit=2)
+    second = await PetActivityLog.page(
+        session, pet.id, before=(first[-1].created_at, first[-1].id), limit=2
+    )
+    assert [row.id for row in first] == [3, 2]
+    assert [row.id for row in second] == [1]
+
+async def test_upgrade_pet_snapshot_backfills_existing_pets(session, pet):
+    session.add(PetMetrics(pet_id=pet.id, happiness=12.0, hunger=34.0, health=56.0, energy=78.0, currency=9))
+    await session.commit()
+    
+    # Recreate a pre-snapshot schema: no sync triggers and no snapshot columns
+    for trigger in ("trg_pet_metrics_snapshot_insert", "trg_pet_metrics_snapshot_update"):
+        await session.execute(text(f"DROP TRIGGER {trigger}"))
+    for column in ("happiness", "hunger", "health", "energy", "currency"):
+        await session.execute(text(f"ALTER TABLE pets DROP COLUMN {column}"))
+    
+    connection = await session.connection()
+    assert await connection.run_sync(upgrade_pet_snapshot)
+    assert not await connection.run_sync(upgrade_pet_snapshot)
+    
+    row = (await session.execute(text("SELECT happiness, currency FROM pets"))).one()
+    assert tuple(row) == (12.0, 9)
+    
+    await session.execute(text("UPDATE pet_metrics SET currency = 10"))
+    assert await session.scalar(text("SELECT currency FROM pets")) == 10
+
+async def test_user_to_dict(session, user):
+    assert User(email="new@example.com", username="new", hashed_password="x").to_dict()["is_active"] is None
+    
+    user.created_at = datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    data = user.to_dict()
+    assert data["is_active"] is True
+    assert data["created_at"] == "2025-01-02T03:04:05+00:00"
+    assert data["last_login"] is None
+
+async def test_record_completion_tracks_streaks(session, user, pet):
+    task = Task(title="Water", pet_id=pet.id, created_by=user.id, recurrence_pattern=RecurrencePattern.DAILY)
+    session.add(task)
+    await session.commit()
+    
+    assert await Task.record_completion(session, task.id) == 1
+    assert await Task.record_completion(session, task.id) == 2
+    
+    # A gap longer than the daily window starts the streak over
+    task.last_completed_at = datetime.now(timezone.utc) - timedelta(days=3)
+    await session.commit()
+    assert await Task.record_completion(session, task.id) == 1
+    
+    await session.refresh(task)
+    assert (task.total_completions, task.streak_count, task.max_streak) == (3, 1, 2)
+
+async def test_task_enum_values_bind_as_raw_strings(session, user, pet):
+    assert TASK_CATEGORIES == {member.value for member in TaskCategory}
+    assert "self_care" in TASK_CATEGORIES and "SELF_CARE" not in TASK_CATEGORIES
+    assert "weekly" in RECURRENCE_PATTERNS
+    
+    task = Task(title="Read", pet_id=pet.id, created_by=user.id, category="study", difficulty="hard")
+    session.add(task)
+    await session.commit()
+    session.expire(task)
+    await session.refresh(task)
+    assert (task.category, task.difficulty) == (TaskCategory.STUDY, TaskDifficulty.HARD)
+    
+    session.add(Task(title="Bad", pet_id=pet.id, created_by=user.id, category="napping"))
+    with pytest.raises(StatementError, match="napping"):
+        await session.flush()
+
+async def test_ownership_increment(session, user, pet):
+    ownership = PetOwnership(pet_id=pet.id, user_id=user.id, role="owner")
+    session.add(ownership)
+    await session.commit()
+    
+    await PetOwnership.increment(session, pet.id, user.id, "total_feeds")
+    await PetOwnership.increment(session, pet.id, user.id, "total_feeds", delta=2)
+    await session.refresh(ownership)
+    assert (ownership.total_feeds, ownership.total_plays) == (3, 0)
+    
+    with pytest.raises(ValueError):
+        await PetOwnership.increment(session, pet.id, user.id, "role")
+
+def test_bulk_to_dict_matches_to_dict():
+    rows = [
+        PetMetrics(happiness=12.25, hunger=0.05, health=99.95, energy=50.0, currency=7),
+        PetMetrics(happiness=0.0, hunger=33.349, health=100.0, energy=66.65, currency=0),
+    ]
+    assert PetMetrics.bulk_to_dict(rows) == [row.to_dict() for row in rows]
+    assert PetMetrics.bulk_to_dict([]) == []
+
+async def test_bulk_upsert_dedupes_pending_alerts(session, user, pet):
+    def row(notification_type, content, pet_id=pet.id):
+        return {
+            "user_id": user.id, "pet_id": pet_id, "notification_type": notification_type,
+            "title": notification_type.value, "content": content
+        }
+    
+    batch = [
+        row(NotificationType.PET_HUNGRY, "first"),
+        row(NotificationType.PET_HUNGRY, "second"),
+        row(NotificationType.PET_SAD, "no pet", pet_id=None),
+        row(NotificationType.PET_SAD, "no pet again", pet_id=None),
+        row(NotificationType.MENTION, "m1"),
+        row(NotificationType.MENTION, "m2"),
+    ]
+    assert len(await Notification.bulk_upsert(session, batch)) == 4
+    # Alerts are still pending, so only the mentions are new
+    assert len(await Notification.bulk_upsert(session, batch)) == 2
+    
+    notifications = (await session.scalars(
+        select(Notification).options(selectinload(Notification.body))
+    )).all()
+    contents = sorted(notification.content for notification in notifications)
+    assert contents == ["first", "m1", "m1", "m2", "m2", "no pet"]
+    
+    # Once read, an alert type can be raised again
+    await session.execute(update(Notification).values(is_read=True))
+    assert len(await Notification.bulk_upsert(session, batch[:1])) == 1
+
+async def test_updated_at_is_readable_after_async_update(session, pet):
+    pet.name = "Mittens"
+    await session.commit()
+    # Fetched during the flush, so reading it doesn't lazy-load outside the greenlet
+    assert "updated_at" in pet.__dict__
+    pet.updated_at
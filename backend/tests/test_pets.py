@@ -0,0 +1,36 @@
+# backend/tests/test_pets.py
+"""
+Tests for the cached pet read endpoints
+"""
+
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
+
+from app.api.v1.endpoints import pets
+from app.api.v1.endpoints.auth import get_current_active_user
+from app.core.database import get_db
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.include_router(pets.router, prefix="/pets")
+    app.dependency_overrides[get_current_active_user] = lambda: {"id": 1}
+    app.dependency_overrides[get_db] = lambda: None
+    return TestClient(app)
+
+def test_cached_pet_read_survives_redis_down():
+    # Nothing listens on port 1, so every Redis call fails to connect
+    FastAPICache.init(RedisBackend(aioredis.from_url("redis://127.0.0.1:1")), prefix="purretys")
+    response = _client().get("/pets/1/metrics/history", params={"hours": 3})
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+
+def test_metrics_history_timestamps_carry_utc_offset():
+    FastAPICache.init(RedisBackend(aioredis.from_url("redis://127.0.0.1:1")), prefix="purretys")
+    history = _client().get("/pets/1/metrics/history", params={"hours": 2}).json()
+    for entry in history:
+        assert datetime.fromisoformat(entry["timestamp"]).utcoffset() == timedelta(0)
@@ -0,0 +1,30 @@
+# backend/tests/test_security.py
+"""
+Tests for JWT issuing, decode caching and revocation
+"""
+
+from datetime import timedelta
+import time
+
+from app.core.security import create_access_token, decode_token, revoke_token
+
+def test_short_lived_token_is_valid_for_its_full_lifetime():
+    token = create_access_token({"sub": "a@example.com"}, expires_delta=timedelta(seconds=5))
+    payload = decode_token(token)
+    assert payload is not None
+    assert payload["exp"] - time.time() > 4
+
+def test_each_login_gets_its_own_token():
+    data = {"sub": "a@example.com", "user_id": 1}
+    first = create_access_token(data)
+    second = create_access_token(data)
+    assert first != second
+    
+    revoke_token(first, decode_token(first))
+    assert decode_token(first) is None
+    assert decode_token(second) is not None
+
+def test_cached_payload_is_not_shared():
+    token = create_access_token({"sub": "a@example.com", "user_id": 1})
+    decode_token(token)["user_id"] = 99
+    assert decode_token(token)["user_id"] == 1
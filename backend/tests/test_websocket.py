@@ -0,0 +1,64 @@
+# backend/tests/test_websocket.py
+"""
+Tests for ConnectionManager room membership
+"""
+
+from app.core.websocket import ConnectionManager
+
+class FakeWebSocket:
+    """Records sent payloads instead of writing to a socket"""
+    
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+    
+    async def accept(self):
+        pass
+    
+    async def send_text(self, text: str):
+        self.sent.append(text)
+    
+    async def close(self, code: int = 1000):
+        self.closed = True
+
+async def test_joining_a_room_leaves_the_previous_one():
+    manager = ConnectionManager()
+    await manager.connect(FakeWebSocket(), "u1", pet_id="1")
+    await manager.join_pet_room("u1", "2")
+    
+    assert manager.get_pet_room_users("1") == []
+    assert manager.get_pet_room_users("2") == ["u1"]
+    assert manager.clients["u1"].pet_id == "2"
+    await manager.shutdown()
+
+async def test_reconnect_replaces_the_old_state():
+    manager = ConnectionManager()
+    old, new = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(old, "u1", pet_id="1")
+    await manager.connect(new, "u1", pet_id="1")
+    
+    assert old.closed
+    assert manager.pet_rooms["1"]["u1"].ws is new
+    await manager.shutdown()
+
+async def test_leaving_another_room_keeps_the_current_one():
+    manager = ConnectionManager()
+    await manager.connect(FakeWebSocket(), "u1", pet_id="1")
+    await manager.leave_pet_room("u1", "2")
+    
+    assert manager.clients["u1"].pet_id == "1"
+    assert manager.get_pet_room_users("1") == ["u1"]
+    await manager.shutdown()
+
+async def test_slow_client_is_disconnected_and_closed():
+    manager = ConnectionManager()
+    ws = FakeWebSocket()
+    await manager.connect(ws, "u1")
+    queue = manager.clients["u1"].send_queue
+    while not queue.full():
+        queue.put_nowait("{}")
+    await manager.send_personal_message("u1", {"type": "ping"})
+    
+    assert "u1" not in manager.clients
+    assert ws.closed
+    await manager.shutdown()